@@ -1,25 +1,101 @@
 import discord
 from discord import app_commands
 import aiohttp
+from aiohttp import web
 import asyncio
 import logging
+import logging.handlers
+import queue
+import atexit
+import signal
 import json
+import copy
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import os
 import re
 import urllib.parse
 import time
-from typing import Set, Dict
-
-# Cache for user IDs
+import io
+import random
+import sqlite3
+import uuid
+import hashlib
+import heapq
+import unicodedata
+from collections import Counter
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Set, Dict, Tuple
+
+# Cache for user IDs, keyed by the name as written in a name list (None for misses)
 USER_ID_CACHE = {}
 
 # Load environment variables
 load_dotenv()
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+# Logging configuration
+LOGGING = {
+    'level': os.getenv('LOG_LEVEL', 'INFO').upper(),
+    'format': os.getenv('LOG_FORMAT', 'text').lower()  # 'text' or 'json' (one object per line)
+}
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line"""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.utcfromtimestamp(record.created).isoformat(timespec='milliseconds') + 'Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        # Records from the queue carry their traceback already formatted in exc_text
+        exception = self.formatException(record.exc_info) if record.exc_info else record.exc_text
+        if exception:
+            entry['exception'] = exception
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False)
+
+class RecordQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records for the listener's formatter rather than pre-formatted text.
+
+    QueueHandler.prepare() formats the record itself and clears exc_info, so
+    the JSON formatter would never see the exception. Here only the message
+    arguments are merged and the traceback is rendered into exc_text, which
+    both formatters print."""
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            # Tracebacks keep every frame and its locals alive while queued
+            record.exc_info = None
+        return record
+
+def setup_logging():
+    """Routes every record through a queue so the event loop never waits on stderr.
+
+    Records are formatted and written by a QueueListener thread; the root
+    logger only enqueues them."""
+    if LOGGING['format'] == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s')
+    output = logging.StreamHandler()
+    output.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    root = logging.getLogger()
+    root.handlers = [RecordQueueHandler(log_queue)]
+    root.setLevel(LOGGING['level'])
+    listener.start()
+    # Flush what is still queued on exit
+    atexit.register(listener.stop)
+
+setup_logging()
 logger = logging.getLogger('discord')
 
 # Enhanced error messages
@@ -45,17 +121,216 @@ AUTHORIZED_USERS = [int(id.strip()) for id in os.getenv('AUTHORIZED_USERS').spli
 
 # Rate limiting configuration
 RATE_LIMIT = {
-    'requests_per_minute': 30,  # Maximum requests per minute
-    'delay_between_requests': 0.5,  # Delay between requests in seconds
-    'last_request_time': None
+    'requests_per_second': float(os.getenv('ENGAGE_REQUESTS_PER_SECOND', '10')),  # Sustained Engage API request rate
+    'burst': int(os.getenv('ENGAGE_RATE_BURST', '10')),  # Requests allowed back to back after an idle period
+    'max_concurrent_sends': int(os.getenv('ENGAGE_MAX_CONCURRENT_SENDS', '5')),  # Engage calls in flight per event
+    'max_concurrent_events': int(os.getenv('MAX_CONCURRENT_EVENTS', '3'))  # Events /sendallop distributes at once
+}
+
+# Bulk credit configuration; bulk mode is off unless ENGAGE_BULK_URL is set.
+# The endpoint takes {"points", "userIds"} and answers {"results": [{"userId", "success"}]},
+# e.g. the batching proxy at {SAHARA_API_URL}/api/bot/engage/bulk
+BULK_SEND = {
+    'url': os.getenv('ENGAGE_BULK_URL'),
+    'batch_size': int(os.getenv('ENGAGE_BULK_SIZE', '100')),  # Users credited per bulk request
+    'request_timeout': float(os.getenv('ENGAGE_BULK_TIMEOUT', '300'))  # Seconds for a whole batch; the proxy paces its calls
+}
+
+# Retry policy for Engage sends
+RETRY_POLICY = {
+    'max_attempts': int(os.getenv('ENGAGE_MAX_ATTEMPTS', '4')),  # Attempts per recipient in one pass
+    'base_delay': 1.0,  # Seconds before the first retry, doubled on every attempt
+    'max_delay': 30.0,  # Upper bound of a single backoff
+    'final_pass_delay': 10.0,  # Seconds to wait before retrying transient failures once more at the end
+    'transient_statuses': {408, 429, 500, 502, 503, 504}  # Statuses worth retrying
+}
+
+# Live progress message configuration
+PROGRESS_UPDATE = {
+    'interval': float(os.getenv('PROGRESS_UPDATE_INTERVAL', '2')),  # Seconds between status message edits
+    'every_sends': int(os.getenv('PROGRESS_UPDATE_EVERY', '100')),  # Edit early after this many sends
+    'min_interval': 1.0  # Never edit the status message more often than this
+}
+
+# Shared HTTP connection pool configuration
+HTTP_POOL = {
+    'max_connections': int(os.getenv('HTTP_MAX_CONNECTIONS', '100')),  # Open connections across all hosts
+    'max_connections_per_host': int(os.getenv('HTTP_MAX_CONNECTIONS_PER_HOST', '20')),  # Open connections to Sahara or Engage
+    'dns_cache_ttl': 300,  # Seconds to cache DNS lookups
+    'keepalive_timeout': 60,  # Seconds to keep idle connections open
+    'connect_timeout': 10,  # Seconds to establish a connection
+    'request_timeout': 60  # Seconds for a whole request including the body
 }
 
 WHITELIST_SECRET = os.getenv('WHITELIST_SECRET')
 
+# Bulk whitelist commands
+WHITELIST_BATCH = {
+    'batch_size': 1000,  # IDs per /whitelist-batch request, the server's maximum
+    'concurrency': 4,  # Batch requests in flight at once
+    'max_file_bytes': 1024 * 1024  # Largest attachment of IDs accepted
+}
+
+# Whitelist kept by the bot for /whitelist list
+WHITELIST_CACHE = {
+    'ttl': float(os.getenv('WHITELIST_CACHE_TTL', '300')),  # Seconds before the list is fetched again
+    'page_size': 20,  # Users per page
+    'view_timeout': 600  # Seconds the page buttons keep working
+}
+
+# Directory of the bot's local state files; must outlive deploys, or interrupted
+# distributions, queued jobs and the send ledger are lost
+BOT_STATE_DIR = os.getenv('BOT_STATE_DIR', '.')
+
+# Local SQLite database holding the send ledger
+BOT_STATE_DB = os.getenv('BOT_STATE_DB', os.path.join(BOT_STATE_DIR, 'bot_state.db'))
+
+# Background distribution jobs, stored in BOT_STATE_DB
+JOB_QUEUE = {
+    'workers': int(os.getenv('JOB_WORKERS', '2')),  # Jobs run at once; /sendallop jobs run MAX_CONCURRENT_EVENTS events each
+    'poll_interval': 30,  # Seconds an idle worker waits before checking the queue again
+    'drain_timeout': float(os.getenv('JOB_DRAIN_TIMEOUT', '20')),  # Seconds a shutdown waits for sends in flight
+    'list_size': 10  # Jobs shown by /jobs
+}
+
+# Cache of single events fetched from /api/bot/events/:id
+EVENT_CACHE = {
+    'ttl': float(os.getenv('EVENT_CACHE_TTL', '30'))  # Seconds an event is served without asking the server
+}
+
+# Site activity relay from /api/bot/logs to the log channel. Off by default: the
+# site posts its own entries to LOG_CHANNEL_ID when it has a DISCORD_TOKEN, so
+# enable the relay only for a site running without one
+LOG_RELAY = {
+    'enabled': os.getenv('LOG_RELAY_ENABLED', 'false').lower() == 'true',
+    'cursor_file': os.getenv('LOG_RELAY_CURSOR_FILE', os.path.join(BOT_STATE_DIR, 'log_relay_cursor.json')),  # Last relayed entry, kept across restarts
+    'page_size': 100,  # Entries fetched per request while catching up
+    'wait': 25,  # Seconds the server may hold a request open waiting for new entries
+    'min_poll_interval': 1,  # Seconds between requests that returned nothing
+    'max_retry_delay': 60  # Upper bound of the backoff after failed requests
+}
+
+# Suggestions for names that match no member
+NAME_SUGGESTIONS = {
+    'top_k': int(os.getenv('NAME_SUGGESTIONS', '3')),  # Candidates shown per unresolved name (0 disables)
+    'min_score': 0.5,  # Lowest trigram similarity worth suggesting
+    'auto_accept': float(os.getenv('NAME_AUTO_ACCEPT', '0')),  # Send to a clear best match at or above this score (0 disables)
+    'shown': 10  # Unresolved names listed with suggestions in a summary embed
+}
+
+# Hashes of the last synced command definitions; delete the file to force a sync
+COMMAND_SYNC_FILE = os.getenv('COMMAND_SYNC_FILE', os.path.join(BOT_STATE_DIR, 'command_sync.json'))
+
+# Local metrics endpoint; set METRICS_PORT=0 to disable it
+METRICS = {
+    'host': os.getenv('METRICS_HOST', '127.0.0.1'),  # Keep it local, the endpoint has no auth
+    'port': int(os.getenv('METRICS_PORT', '9108')),
+    'loop_lag_interval': 0.5  # Seconds between event loop lag probes
+}
+
+class Metrics:
+    """Counters, gauges and histograms served in the Prometheus text format on /metrics"""
+    # name -> (type, help); only described metrics are rendered
+    DESCRIPTIONS = {
+        'op_sends_total': ('counter', "Recipients processed by distributions, by result"),
+        'engage_requests_total': ('counter', "Engage API requests, by endpoint and response status"),
+        'engage_request_seconds': ('histogram', "Engage API request latency"),
+        'sahara_request_seconds': ('histogram', "Sahara API request latency"),
+        'name_resolution_total': ('counter', "Name list lookups, by source and result"),
+        'name_suggestions_total': ('counter', "Unresolved names given suggestions or auto-matched to a member"),
+        'discord_followup_seconds': ('histogram', "Latency of Discord messages sent or edited by distributions"),
+        'event_loop_lag_seconds': ('histogram', "Delay of the event loop in waking a sleeping task"),
+        'op_send_queue_depth': ('gauge', "Sends and batches waiting for a worker"),
+        'engage_rate_limiter_waiting': ('gauge', "Engage requests waiting for a rate limiter token"),
+        'engage_rate_limit_rps': ('gauge', "Current Engage request rate allowed by the rate limiter")
+    }
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+    def __init__(self):
+        self._values: Dict[str, Dict[tuple, float]] = {}
+        self._histograms: Dict[str, Dict[tuple, list]] = {}
+        # Gauges read when scraped: name -> function returning the value
+        self._gauge_functions = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        series = self._values.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        self._values.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+
+    def gauge_function(self, name: str, function):
+        self._gauge_functions[name] = function
+
+    def observe(self, name: str, seconds: float, **labels):
+        # Per-bucket counts followed by the sum of observations
+        series = self._histograms.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        counts = series.setdefault(key, [0] * (len(self.BUCKETS) + 1) + [0.0])
+        for i, bound in enumerate(self.BUCKETS):
+            if seconds <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[len(self.BUCKETS)] += 1
+        counts[-1] += seconds
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Observes how long the with block took, including awaits"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - started, **labels)
+
+    @staticmethod
+    def _labels(key: tuple, le: str = None) -> str:
+        pairs = list(key) + ([('le', le)] if le else [])
+        if not pairs:
+            return ""
+        def escape(value) -> str:
+            return str(value).replace('\\', '\\\\').replace('"', '\\"')
+        return "{" + ",".join(f'{label}="{escape(value)}"' for label, value in pairs) + "}"
+
+    def render(self) -> str:
+        lines = []
+        for name, (kind, help_text) in self.DESCRIPTIONS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if name in self._gauge_functions:
+                lines.append(f"{name} {self._gauge_functions[name]()}")
+            for key, value in self._values.get(name, {}).items():
+                lines.append(f"{name}{self._labels(key)} {value}")
+            for key, counts in self._histograms.get(name, {}).items():
+                cumulative = 0
+                for bound, count in zip(self.BUCKETS + ('+Inf',), counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{self._labels(key, str(bound))} {cumulative}")
+                lines.append(f"{name}_sum{self._labels(key)} {counts[-1]}")
+                lines.append(f"{name}_count{self._labels(key)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Serves GET /metrics"""
+        return web.Response(text=self.render(), content_type='text/plain', charset='utf-8')
+
 class PauseManager:
     def __init__(self):
         self.paused_events: Dict[str, float] = {}
-        self.pause_file = "paused_events.json"
+        self.pause_file = os.path.join(BOT_STATE_DIR, "paused_events.json")
+        # Set while a running distribution should stop sending: event_id -> signal
+        self._stop_signals: Dict[str, asyncio.Event] = {}
+        self._cancelled: Set[str] = set()
+        # Runs stopped by stop_all() rather than by a pause or cancel
+        self._interrupted: Set[str] = set()
+        # Events resumed while their paused run was still finishing its sends in flight
+        self._resumed: Set[str] = set()
+        self.shutting_down = False
+        # Background write of paused_events; _dirty asks it to write once more
+        self._save_task: asyncio.Task = None
+        self._dirty = False
         self._load_paused_events()
 
     def _load_paused_events(self):
@@ -69,18 +344,46 @@ class PauseManager:
             self.paused_events = {}
 
     def _save_paused_events(self):
-        """Saves the list of paused events to a file"""
+        """Saves the list of paused events to a file without blocking the event loop.
+
+        A burst of pauses and resumes is coalesced into one write of the
+        latest state; only one write runs at a time."""
+        self._dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Outside the bot's event loop there is nothing to stall
+            self._dirty = False
+            self._write_snapshot(dict(self.paused_events))
+            return
+        if self._save_task is None or self._save_task.done():
+            self._save_task = loop.create_task(self._save_in_background())
+
+    def _write_snapshot(self, snapshot: dict):
         try:
-            with open(self.pause_file, 'w') as f:
-                json.dump(self.paused_events, f)
+            atomic_write_json(self.pause_file, snapshot)
         except Exception as e:
             logger.error(f"Error saving paused events: {e}")
 
+    async def _save_in_background(self):
+        while self._dirty:
+            self._dirty = False
+            # Copied on the loop thread, so commands can change the state during the write
+            await asyncio.to_thread(self._write_snapshot, dict(self.paused_events))
+
+    async def flush(self):
+        """Waits for pending writes of the paused events"""
+        if self._save_task:
+            await self._save_task
+
     def pause_event(self, event_id: str) -> bool:
         """Pauses an event"""
         if event_id not in self.paused_events:
             self.paused_events[event_id] = time.time()
             self._save_paused_events()
+            self._resumed.discard(event_id)
+            if event_id in self._stop_signals:
+                self._stop_signals[event_id].set()
             return True
         return False
 
@@ -89,9 +392,73 @@ class PauseManager:
         if event_id in self.paused_events:
             del self.paused_events[event_id]
             self._save_paused_events()
+            # The stopping run cannot be restarted; process_single_event runs the event again
+            if event_id in self._stop_signals and event_id not in self._cancelled:
+                self._resumed.add(event_id)
+            return True
+        return False
+
+    def cancel_event(self, event_id: str) -> bool:
+        """Stops the running distribution of an event without pausing it"""
+        if event_id in self._stop_signals:
+            self._cancelled.add(event_id)
+            self._stop_signals[event_id].set()
             return True
         return False
 
+    def start_run(self, event_id: str) -> asyncio.Event:
+        """Registers a running distribution and returns the signal it must watch.
+
+        Returns None if a distribution of the event is already registered;
+        its signal must not be replaced, or /pause and /cancel would only
+        reach one of the runs."""
+        if event_id in self._stop_signals:
+            return None
+        stop_signal = asyncio.Event()
+        if self.is_paused(event_id):
+            stop_signal.set()
+        elif self.shutting_down:
+            self._interrupted.add(event_id)
+            stop_signal.set()
+        self._stop_signals[event_id] = stop_signal
+        self._cancelled.discard(event_id)
+        return stop_signal
+
+    def stop_all(self):
+        """Stops every running distribution for a shutdown; progress and jobs are kept"""
+        self.shutting_down = True
+        for event_id, stop_signal in self._stop_signals.items():
+            if not stop_signal.is_set() or event_id in self._resumed:
+                self._interrupted.add(event_id)
+                stop_signal.set()
+
+    def finish_run(self, event_id: str):
+        """Unregisters a distribution once it has stopped"""
+        self._stop_signals.pop(event_id, None)
+        self._cancelled.discard(event_id)
+
+    def is_running(self, event_id: str) -> bool:
+        """Checks if a distribution of an event is in progress"""
+        return event_id in self._stop_signals
+
+    def is_cancelled(self, event_id: str) -> bool:
+        """Checks if the running distribution of an event was cancelled"""
+        return event_id in self._cancelled
+
+    def take_resumed(self, event_id: str) -> bool:
+        """Checks, once, whether an event was resumed while its run was stopping.
+
+        Only true once that run has unregistered, not for a caller that
+        found it still running."""
+        if event_id in self._resumed and event_id not in self._stop_signals:
+            self._resumed.discard(event_id)
+            return True
+        return False
+
+    def is_interrupted(self, event_id: str) -> bool:
+        """Checks if a distribution of an event was stopped by a shutdown"""
+        return event_id in self._interrupted
+
     def is_paused(self, event_id: str) -> bool:
         """Checks if an event is paused"""
         return event_id in self.paused_events
@@ -102,50 +469,112 @@ class PauseManager:
             return time.time() - self.paused_events[event_id]
         return 0
 
+def atomic_write_json(path: str, data):
+    """Writes JSON to a temporary file and renames it over path, so readers never see a partial file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
 class DistributionProgress:
+    """Tracks which users of a running distribution have already received OP.
+
+    Each completed send is appended to a journal; the journal is folded into
+    the JSON snapshot every COMPACT_EVERY entries and whenever a distribution
+    starts or ends, so resuming never re-sends to a completed user."""
+    COMPACT_EVERY = 500
+
     def __init__(self):
-        self.progress_file = "distribution_progress.json"
+        self.progress_file = os.path.join(BOT_STATE_DIR, "distribution_progress.json")
+        self.journal_file = os.path.join(BOT_STATE_DIR, "distribution_progress.journal")
         self.active_distributions = {}  # event_id -> progress_data
+        self._journal = None
+        self._journal_entries = 0
         self._load_progress()
 
     def _load_progress(self):
-        """Loads distribution progress from a file"""
+        """Loads distribution progress from the snapshot and replays the journal"""
         try:
             if os.path.exists(self.progress_file):
                 with open(self.progress_file, 'r') as f:
                     self.active_distributions = json.load(f)
+            for progress in self.active_distributions.values():
+                progress['completed_users'] = set(progress['completed_users'])
         except Exception as e:
             logger.error(f"Error loading distribution progress: {e}")
             self.active_distributions = {}
 
+        try:
+            if os.path.exists(self.journal_file):
+                with open(self.journal_file, 'r') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            # A crash can leave the last line half written
+                            continue
+                        self._apply(entry)
+                self._save_progress()
+        except Exception as e:
+            logger.error(f"Error replaying distribution journal: {e}")
+
+    def _apply(self, entry: dict):
+        progress = self.active_distributions.get(entry['event_id'])
+        # Entries of distributions removed since the last snapshot are ignored
+        if progress is not None:
+            progress['completed_users'].add(entry['user_key'])
+            progress['current_dist_index'] = max(progress['current_dist_index'], entry['dist_index'])
+            progress['current_user_index'] = len(progress['completed_users'])
+
     def _save_progress(self):
-        """Saves distribution progress to a file"""
+        """Writes a snapshot of all progress and truncates the journal"""
         try:
-            with open(self.progress_file, 'w') as f:
-                json.dump(self.active_distributions, f)
+            atomic_write_json(self.progress_file, {
+                event_id: {**progress, 'completed_users': sorted(progress['completed_users'])}
+                for event_id, progress in self.active_distributions.items()
+            })
+            if self._journal:
+                self._journal.close()
+            self._journal = open(self.journal_file, 'w')
+            self._journal_entries = 0
         except Exception as e:
             logger.error(f"Error saving distribution progress: {e}")
 
     def start_distribution(self, event_id: str, distributions: list):
         """Starts a new distribution"""
         self.active_distributions[event_id] = {
-            'distributions': distributions,
+            'distributions': [{'id': dist.get('id'), 'xpAmount': dist.get('xpAmount')} for dist in distributions],
             'current_dist_index': 0,
             'current_user_index': 0,
-            'completed_users': [],  # Changed to list for JSON serialization
+            'completed_users': set(),
             'start_time': time.time()
         }
         self._save_progress()
 
-    def update_progress(self, event_id: str, dist_index: int, user_index: int, user_id: str):
-        """Updates distribution progress"""
-        if event_id in self.active_distributions:
-            self.active_distributions[event_id]['current_dist_index'] = dist_index
-            self.active_distributions[event_id]['current_user_index'] = user_index
-            if user_id and user_id not in self.active_distributions[event_id]['completed_users']:
-                self.active_distributions[event_id]['completed_users'].append(user_id)
+    def update_progress(self, event_id: str, dist_index: int, user_key: str):
+        """Records that user_key of an event has received OP"""
+        if event_id not in self.active_distributions:
+            return
+        entry = {'event_id': event_id, 'dist_index': dist_index, 'user_key': user_key}
+        self._apply(entry)
+        try:
+            if self._journal is None:
+                self._journal = open(self.journal_file, 'a')
+            self._journal.write(json.dumps(entry) + '\n')
+            self._journal.flush()
+            self._journal_entries += 1
+        except Exception as e:
+            logger.error(f"Error writing distribution journal: {e}")
+        if self._journal_entries >= self.COMPACT_EVERY:
             self._save_progress()
 
+    def is_completed(self, event_id: str, user_key: str) -> bool:
+        """Checks whether user_key of an event has already received OP"""
+        progress = self.active_distributions.get(event_id)
+        return progress is not None and user_key in progress['completed_users']
+
     def get_progress(self, event_id: str):
         """Gets the current distribution progress"""
         return self.active_distributions.get(event_id)
@@ -156,9 +585,926 @@ class DistributionProgress:
             del self.active_distributions[event_id]
             self._save_progress()
 
+class SendLedger:
+    """Records every (event, distribution, user) credit so nobody is credited twice.
+
+    A send first claims its key as 'pending', then marks it 'sent' on success
+    or releases it on failure. A send that may have reached Engage without an
+    answer is marked 'unknown' and never sent again automatically; operators
+    settle it with /resolvecredit. Pending keys owned by this process belong
+    to a send in flight. Pending keys of an earlier process were interrupted
+    by a crash mid-send, so they are unknown too.
+
+    The distribution part of the key is the points and occurrence built by
+    resolve_event_recipients, which survives edits of the event."""
+    def __init__(self, path: str = BOT_STATE_DB):
+        self.owner = uuid.uuid4().hex
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS credits (
+                event_id TEXT NOT NULL,
+                distribution TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                points INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                owner TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (event_id, distribution, user_id)
+            ) WITHOUT ROWID
+        """)
+
+    def is_sent(self, event_id: str, distribution: str, user_id: str) -> bool:
+        """Checks whether a user was already credited for a distribution"""
+        row = self.conn.execute(
+            "SELECT status FROM credits WHERE event_id = ? AND distribution = ? AND user_id = ?",
+            (event_id, distribution, user_id)
+        ).fetchone()
+        return row is not None and row[0] == 'sent'
+
+    def claim(self, event_id: str, distribution: str, user_id: str, points: int) -> bool:
+        """Reserves a credit before sending; False if it is sent, being sent, or of unknown outcome"""
+        return bool(self.conn.execute(
+            "INSERT OR IGNORE INTO credits VALUES (?, ?, ?, ?, 'pending', ?, ?)",
+            (event_id, distribution, user_id, points, self.owner, time.time())
+        ).rowcount)
+
+    def confirm(self, event_id: str, distribution: str, user_id: str):
+        """Marks a claimed credit as sent"""
+        self.conn.execute(
+            "UPDATE credits SET status = 'sent', updated_at = ? WHERE event_id = ? AND distribution = ? AND user_id = ?",
+            (time.time(), event_id, distribution, user_id)
+        )
+
+    def release(self, event_id: str, distribution: str, user_id: str):
+        """Drops a claim whose send failed, so a later run can try again"""
+        self.conn.execute(
+            "DELETE FROM credits WHERE event_id = ? AND distribution = ? AND user_id = ? AND status = 'pending' AND owner = ?",
+            (event_id, distribution, user_id, self.owner)
+        )
+
+    def mark_unknown(self, event_id: str, distribution: str, user_id: str):
+        """Keeps a claim whose send may have credited the user, so no run sends it again"""
+        self.conn.execute(
+            "UPDATE credits SET status = 'unknown', updated_at = ? "
+            "WHERE event_id = ? AND distribution = ? AND user_id = ? AND status = 'pending' AND owner = ?",
+            (time.time(), event_id, distribution, user_id, self.owner)
+        )
+
+    # Credits whose outcome is unknown, including sends interrupted by a crash
+    UNKNOWN = "(status = 'unknown' OR (status = 'pending' AND owner != ?))"
+
+    def unknown_credits(self, event_id: str = None) -> list:
+        """Returns (event_id, distribution, user_id, points) of credits whose outcome is unknown"""
+        return self.conn.execute(
+            "SELECT event_id, distribution, user_id, points FROM credits "
+            f"WHERE {self.UNKNOWN} AND (? IS NULL OR event_id = ?) ORDER BY updated_at",
+            (self.owner, event_id, event_id)
+        ).fetchall()
+
+    def resolve_unknown(self, event_id: str, user_id: str) -> int:
+        """Marks a user's unknown credits of an event as sent; returns how many there were"""
+        return self.conn.execute(
+            f"UPDATE credits SET status = 'sent', updated_at = ? WHERE event_id = ? AND user_id = ? AND {self.UNKNOWN}",
+            (time.time(), event_id, user_id, self.owner)
+        ).rowcount
+
+    def reclaim_unknown(self, event_id: str, user_id: str) -> list:
+        """Claims a user's unknown credits of an event for sending again; returns (distribution, points) pairs"""
+        # fetchall() steps the statement to completion so the write is committed
+        return self.conn.execute(
+            "UPDATE credits SET status = 'pending', owner = ?, updated_at = ? "
+            f"WHERE event_id = ? AND user_id = ? AND {self.UNKNOWN} RETURNING distribution, points",
+            (self.owner, time.time(), event_id, user_id, self.owner)
+        ).fetchall()
+
+class JobQueue:
+    """Persistent queue of distribution jobs.
+
+    Commands enqueue jobs and return at once; OPBot's workers run them and
+    report to the job's channel. Jobs that were running when the bot stopped
+    are queued again on start; distributions resume from their progress.
+
+    Kinds are 'event' (one event, /sendop and /resume) and 'all_events'
+    (every pending event, /sendallop)."""
+    def __init__(self, path: str = BOT_STATE_DB):
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                event_id TEXT,
+                channel_id INTEGER NOT NULL,
+                requested_by INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                detail TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+        requeued = self.conn.execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'"
+        ).rowcount
+        if requeued:
+            logger.info(f"Requeued {requeued} jobs interrupted by the last shutdown")
+        # Set whenever a job is queued, so idle workers wake up at once
+        self.wakeup = asyncio.Event()
+
+    def enqueue(self, kind: str, event_id: str, channel_id: int, requested_by: int) -> Tuple[int, bool]:
+        """Queues a job; returns (job id, False) instead if the same job is already queued or running"""
+        row = self.conn.execute(
+            "SELECT id FROM jobs WHERE kind = ? AND event_id IS ? AND status IN ('queued', 'running')",
+            (kind, event_id)
+        ).fetchone()
+        if row:
+            return row['id'], False
+
+        job_id = self.conn.execute(
+            "INSERT INTO jobs (kind, event_id, channel_id, requested_by, status, created_at) VALUES (?, ?, ?, ?, 'queued', ?)",
+            (kind, event_id, channel_id, requested_by, time.time())
+        ).lastrowid
+        self.wakeup.set()
+        return job_id, True
+
+    def claim_next(self) -> sqlite3.Row:
+        """Marks the oldest queued job as running and returns it, or None"""
+        # fetchall() steps the statement to completion so the write is committed
+        rows = self.conn.execute(
+            "UPDATE jobs SET status = 'running', started_at = ? "
+            "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1) RETURNING *",
+            (time.time(),)
+        ).fetchall()
+        return rows[0] if rows else None
+
+    def finish(self, job_id: int, status: str, detail: str = None):
+        """Records the outcome of a job: done, stopped or failed"""
+        self.conn.execute(
+            "UPDATE jobs SET status = ?, detail = ?, finished_at = ? WHERE id = ?",
+            (status, detail, time.time(), job_id)
+        )
+
+    def get(self, job_id: int) -> sqlite3.Row:
+        return self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    def recent(self, limit: int) -> list:
+        """Returns active jobs and the latest finished ones, newest first"""
+        return self.conn.execute(
+            "SELECT * FROM jobs ORDER BY status IN ('queued', 'running') DESC, id DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+
+class HistoryIndex:
+    """Maps normalised names and Discord IDs to the completed distributions they appear in.
+
+    The index is built from /api/bot/events once and then refreshed with only
+    the events whose event or distributions changed since the last refresh."""
+    REFRESH_INTERVAL = 60  # Seconds between incremental refreshes
+    REBUILD_INTERVAL = 6 * 60 * 60  # Seconds between full rebuilds, which drop deleted events
+
+    def __init__(self):
+        self.entries: Dict[str, list] = {}  # name -> [{'event_id', 'dist_id', 'title', 'op'}]
+        self.keys_by_event: Dict[int, Set[str]] = {}
+        self.cursor = None  # Server time of the last refresh, the next updatedAfter
+        self._last_refresh = 0.0
+        self._last_rebuild = 0.0
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        """Folds a name list entry so IDs, mentions, @names and case variants match"""
+        name = name.strip()
+        return parse_user_id(name) or name.lstrip('@').strip().casefold()
+
+    def index_event(self, event: dict):
+        """Adds or replaces the entries of one event; events that are not Completed are removed"""
+        self._unindex(event['id'])
+        if event.get('status') != 'Completed':
+            return
+
+        keys = set()
+        for dist_index, dist in enumerate(event.get('distributions', []), 1):
+            entry = {
+                'event_id': event['id'],
+                'dist_id': dist.get('id', dist_index),
+                'title': event['title'],
+                'op': dist['xpAmount']
+            }
+            for name in {self.normalize(name) for name in dist.get('nameList', '').split('\n') if name.strip()}:
+                self.entries.setdefault(name, []).append(entry)
+                keys.add(name)
+        self.keys_by_event[event['id']] = keys
+
+    def _unindex(self, event_id: int):
+        for key in self.keys_by_event.pop(event_id, ()):
+            remaining = [entry for entry in self.entries[key] if entry['event_id'] != event_id]
+            if remaining:
+                self.entries[key] = remaining
+            else:
+                del self.entries[key]
+
+    async def refresh(self, session: aiohttp.ClientSession, force: bool = False) -> bool:
+        """Fetches events changed since the last refresh; returns False if the fetch failed"""
+        async with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_refresh < self.REFRESH_INTERVAL:
+                return True
+
+            rebuild = self.cursor is None or now - self._last_rebuild >= self.REBUILD_INTERVAL
+            listing = {}
+            if rebuild:
+                events = iter_bot_events(session, status='Completed', listing=listing)
+                entries, keys_by_event = self.entries, self.keys_by_event
+                self.entries, self.keys_by_event = {}, {}
+            else:
+                events = iter_bot_events(session, updated_after=self.cursor, listing=listing)
+
+            count = 0
+            try:
+                async for event in events:
+                    self.index_event(event)
+                    count += 1
+            except Exception as e:
+                logger.error(f"Error refreshing history index: {e}")
+                if rebuild:
+                    # Keep serving the previous index rather than a partial one
+                    self.entries, self.keys_by_event = entries, keys_by_event
+                return False
+
+            if rebuild:
+                self._last_rebuild = now
+            # The server's clock, read before its first page was queried, so
+            # nothing changed during this refresh is skipped by the next one
+            self.cursor = listing.get('serverTime') or self.cursor
+            self._last_refresh = now
+            logger.info(f"History index refreshed with {count} events ({'full' if rebuild else 'incremental'})")
+            return True
+
+    def lookup(self, member: discord.Member) -> list:
+        """Returns the distributions a member received OP from"""
+        names = {str(member.id), member.name, member.global_name, member.display_name}
+        seen = set()
+        user_events = []
+        for name in names:
+            if not name:
+                continue
+            for entry in self.entries.get(self.normalize(name), ()):
+                key = (entry['event_id'], entry['dist_id'])
+                if key not in seen:
+                    seen.add(key)
+                    user_events.append(entry)
+        return user_events
+
+class EventCache:
+    """Caches events from /api/bot/events/:id.
+
+    Entries younger than max_age are served without a request; older ones
+    are revalidated with If-None-Match, so an unchanged event costs a 304.
+    Concurrent requests for the same event share one fetch."""
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        # event_id -> (fetched at, ETag, event data)
+        self._entries: Dict[str, Tuple[float, str, dict]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def get(self, session: aiohttp.ClientSession, event_id: str, max_age: float = None) -> dict:
+        """Returns the event, or None if it could not be fetched"""
+        event_id = str(event_id)
+        max_age = self.ttl if max_age is None else max_age
+        entry = self._entries.get(event_id)
+        if entry and time.monotonic() - entry[0] < max_age:
+            return entry[2]
+
+        if event_id not in self._inflight:
+            self._inflight[event_id] = asyncio.create_task(self._fetch(session, event_id))
+        # A cancelled caller must not cancel the fetch other callers wait for
+        return await asyncio.shield(self._inflight[event_id])
+
+    def invalidate(self, event_id: str):
+        """Drops a cached event, e.g. after changing it"""
+        self._entries.pop(str(event_id), None)
+
+    async def _fetch(self, session: aiohttp.ClientSession, event_id: str) -> dict:
+        url = f"{SAHARA_API_URL.rstrip('/')}/api/bot/events/{event_id}"
+        headers = {
+            'Content-Type': 'application/json',
+            'x-api-key': API_HEADERS['x-api-key']
+        }
+        entry = self._entries.get(event_id)
+        if entry and entry[1]:
+            headers['If-None-Match'] = entry[1]
+
+        logger.debug("Fetching event status from: %s", url)
+        try:
+            with metrics.timer('sahara_request_seconds', endpoint='bot_event'):
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 304 and entry:
+                        self._entries[event_id] = (time.monotonic(), entry[1], entry[2])
+                        return entry[2]
+
+                    if response.status != 200:
+                        error_text = await response.text()
+                        logger.error(f"Error getting event {event_id}. Status: {response.status}, Response: {error_text}")
+                        if response.status == 404:
+                            self.invalidate(event_id)
+                        return None
+
+                    event_data = await response.json()
+                    self._entries[event_id] = (time.monotonic(), response.headers.get('ETag'), event_data)
+                    return event_data
+        except Exception as e:
+            logger.error(f"Error getting event status: {e}")
+            return None
+        finally:
+            self._inflight.pop(event_id, None)
+
+class RateLimiter:
+    """Token bucket that caps how many requests per second are sent to an API.
+
+    The rate halves when the API answers 429 and creeps back up to the
+    configured ceiling with every success."""
+    def __init__(self, rate: float, burst: int):
+        self.max_rate = rate
+        self.min_rate = rate / 20
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._last_slowdown = 0.0
+        self.waiting = 0
+        # The lock is fair, so waiters are served in the order they arrived
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, count: int = 1):
+        """Waits until count tokens are available and takes them.
+
+        A count above the burst waits for a full bucket and leaves it in
+        debt, which later requests pay off at the current rate."""
+        needed = min(count, self.burst)
+        self.waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    blocked_for = self._blocked_until - time.monotonic()
+                    if blocked_for > 0:
+                        await asyncio.sleep(blocked_for)
+                    self._refill()
+                    if self._tokens >= needed:
+                        self._tokens -= count
+                        return
+                    await asyncio.sleep((needed - self._tokens) / self.rate)
+        finally:
+            self.waiting -= 1
+
+    def refund(self, count: int = 1):
+        """Gives back tokens taken for requests that were not sent"""
+        self._refill()
+        self._tokens = min(self.burst, self._tokens + count)
+
+    def slow_down(self, retry_after: float = 0):
+        """Halves the rate after a 429 and holds all requests for retry_after seconds"""
+        now = time.monotonic()
+        self._blocked_until = max(self._blocked_until, now + retry_after)
+        # Responses to requests sent before the last slowdown say nothing new
+        if now - self._last_slowdown >= 1:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._last_slowdown = now
+            logger.warning("Rate limited by API, slowing down to %.2f requests/s", self.rate)
+
+    def speed_up(self):
+        """Raises the rate a little after a successful request"""
+        if self.rate < self.max_rate:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 100)
+
+class SendEngine:
+    """Sends OP through a bounded pool of workers sharing one rate limiter"""
+    # Queues of every running pass, for the queue depth metric
+    active_queues: Set[asyncio.Queue] = set()
+
+    def __init__(self, session: aiohttp.ClientSession, concurrency: int = None):
+        self.session = session
+        self.concurrency = max(1, concurrency or RATE_LIMIT['max_concurrent_sends'])
+
+    async def run(self, jobs: list, on_result, stop_signal: asyncio.Event = None) -> bool:
+        """Sends every job and awaits on_result(job, success) once per job.
+
+        Every job is claimed in send_ledger once its rate limiter token is
+        taken, so a run cancelled while waiting leaves no claim behind; jobs
+        another run has already credited, or is crediting, report
+        success=None. In bulk mode
+        jobs with the same points are sent in batches. Jobs that still fail
+        with a transient error are retried one by one in a final pass. Once
+        stop_signal is set workers take no new jobs or batches; sends already
+        in flight still finish. Sends that may have reached Engage without an
+        answer report success=False with job['outcome_unknown'] set. Returns
+        False if jobs were left unsent."""
+        async def record(job, success):
+            if success is None:
+                result = 'skipped'
+            elif success:
+                result = 'success'
+            else:
+                result = 'unknown' if job.get('outcome_unknown') else 'failed'
+            metrics.inc('op_sends_total', result=result)
+            await on_result(job, success)
+
+        deferred = []
+        finished = await self._run_pass(self._batches(jobs) if BULK_SEND['url'] else jobs,
+                                        record, stop_signal, deferred)
+        if finished and deferred:
+            logger.info(f"Retrying {len(deferred)} transient failures after {RETRY_POLICY['final_pass_delay']}s")
+            if stop_signal is None:
+                await asyncio.sleep(RETRY_POLICY['final_pass_delay'])
+            else:
+                try:
+                    await asyncio.wait_for(stop_signal.wait(), RETRY_POLICY['final_pass_delay'])
+                except asyncio.TimeoutError:
+                    pass
+            finished = await self._run_pass(deferred, record, stop_signal, None)
+        return finished
+
+    @staticmethod
+    def _batches(jobs: list) -> list:
+        """Groups jobs with the same points into lists of up to BULK_SEND['batch_size']"""
+        by_points = {}
+        for job in jobs:
+            by_points.setdefault(job['points'], []).append(job)
+        size = max(1, BULK_SEND['batch_size'])
+        return [group[i:i + size] for group in by_points.values() for i in range(0, len(group), size)]
+
+    async def _run_pass(self, items: list, on_result, stop_signal: asyncio.Event, deferred: list) -> bool:
+        queue = asyncio.Queue()
+        for item in items:
+            queue.put_nowait(item)
+        self.active_queues.add(queue)
+
+        workers = [
+            asyncio.create_task(self._worker(queue, on_result, stop_signal, deferred))
+            for _ in range(min(self.concurrency, len(items)))
+        ]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            for worker in workers:
+                worker.cancel()
+            raise
+        finally:
+            self.active_queues.discard(queue)
+        return queue.empty()
+
+    async def _worker(self, queue: asyncio.Queue, on_result, stop_signal: asyncio.Event, deferred: list):
+        while stop_signal is None or not stop_signal.is_set():
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            if isinstance(item, list):
+                await self._send_batch(item, on_result, deferred)
+            else:
+                await self._send_one(item, on_result, deferred)
+
+    async def _send_one(self, job: dict, on_result, deferred: list):
+        ledger_key = (str(job['event_id']), job['dist_key'], job['user_id'])
+        await engage_rate_limiter.acquire()
+        if not send_ledger.claim(*ledger_key, job['points']):
+            engage_rate_limiter.refund()
+            await on_result(job, None)
+            return
+
+        success, retryable = await send_op_to_user(
+            session=self.session,
+            user_id=job['user_id'],
+            points=job['points'],
+            reason=f"Event #{job['event_id']}",
+            event_id=int(job['event_id']),
+            acquired=True,
+            ledger_key=ledger_key
+        )
+        if success:
+            send_ledger.confirm(*ledger_key)
+        elif success is None:
+            # Engage may have credited the user; the claim stays so no run sends again
+            send_ledger.mark_unknown(*ledger_key)
+            job['outcome_unknown'] = True
+        else:
+            send_ledger.release(*ledger_key)
+        if not success and retryable and deferred is not None:
+            deferred.append(job)
+            return
+        await on_result(job, bool(success))
+
+    async def _send_batch(self, batch: list, on_result, deferred: list):
+        await engage_rate_limiter.acquire(len(batch))
+        claimed, skipped = [], []
+        for job in batch:
+            if send_ledger.claim(str(job['event_id']), job['dist_key'], job['user_id'], job['points']):
+                claimed.append(job)
+            else:
+                skipped.append(job)
+        engage_rate_limiter.refund(len(skipped))
+
+        # Nothing is awaited between the claims and the request, so a cancelled
+        # batch either never claimed or is released by send_op_bulk
+        results = {}
+        if claimed:
+            results = await send_op_bulk(
+                self.session,
+                [job['user_id'] for job in claimed],
+                claimed[0]['points'],
+                acquired=True,
+                ledger_keys=[(str(job['event_id']), job['dist_key'], job['user_id']) for job in claimed]
+            )
+        for job in skipped:
+            await on_result(job, None)
+        # Settle every claim before awaiting anything, so a cancellation cannot strand them
+        for job in claimed:
+            ledger_key = (str(job['event_id']), job['dist_key'], job['user_id'])
+            outcome = results.get(job['user_id'])
+            if outcome:
+                send_ledger.confirm(*ledger_key)
+            elif outcome is False:
+                send_ledger.release(*ledger_key)
+            else:
+                # The proxy may still have credited the user; the claim stays so no run sends again
+                send_ledger.mark_unknown(*ledger_key)
+                job['outcome_unknown'] = True
+        for job in claimed:
+            outcome = results.get(job['user_id'])
+            if outcome is False:
+                # Fall back to a single send for users the batch certainly did not credit
+                await self._send_one(job, on_result, deferred)
+            else:
+                await on_result(job, bool(outcome))
+
+class ProgressReporter:
+    """Keeps one status message of a running distribution up to date.
+
+    Sends only update counters; a background task edits the message every
+    PROGRESS_UPDATE['interval'] seconds, or sooner after every_sends sends,
+    so Discord round trips stay off the send path."""
+    def __init__(self, event_id: str, title: str, total: int):
+        self.event_id = event_id
+        self.title = title
+        self.total = total
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.message = None
+        self._start_time = time.monotonic()
+        self._since_update = 0
+        self._wake = asyncio.Event()
+        self._task = None
+
+    @property
+    def done(self) -> int:
+        return self.succeeded + self.failed + self.skipped
+
+    def record(self, success: bool):
+        """Counts one finished send; None means another run already credited the user"""
+        if success is None:
+            self.skipped += 1
+        elif success:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        self._since_update += 1
+        if self._since_update >= PROGRESS_UPDATE['every_sends']:
+            self._wake.set()
+
+    def _embed(self, final_title: str = None) -> discord.Embed:
+        elapsed = time.monotonic() - self._start_time
+        rate = self.done / elapsed if elapsed > 0 else 0
+        remaining = self.total - self.done
+        eta = f"{remaining / rate:.0f}s" if rate > 0 and remaining > 0 else "—"
+        percent = self.done * 100 // self.total if self.total else 100
+
+        embed = discord.Embed(
+            title=final_title or "⏳ Distribution in Progress",
+            description=f"Event #{self.event_id} - {self.title}",
+            color=discord.Color.blue()
+        )
+        embed.add_field(name="Progress", value=f"{self.done}/{self.total} ({percent}%)", inline=True)
+        embed.add_field(name="Sent / Failed", value=f"✅ {self.succeeded} / ❌ {self.failed}", inline=True)
+        embed.add_field(name="Rate", value=f"{rate:.1f}/s", inline=True)
+        embed.add_field(name="Elapsed", value=f"{elapsed:.0f}s", inline=True)
+        embed.add_field(name="ETA", value=eta, inline=True)
+        return embed
+
+    async def start(self, send):
+        """Posts the status message with send() and starts refreshing it"""
+        self._start_time = time.monotonic()
+        with metrics.timer('discord_followup_seconds', action='send'):
+            self.message = await send(embed=self._embed())
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=PROGRESS_UPDATE['interval'])
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            self._since_update = 0
+            await self._edit()
+            await asyncio.sleep(PROGRESS_UPDATE['min_interval'])
+
+    async def _edit(self, final_title: str = None):
+        # One aggregated log line per refresh instead of one per send
+        logger.info("Event %s: %d/%d done, %d sent, %d failed, %d skipped",
+                    self.event_id, self.done, self.total, self.succeeded, self.failed, self.skipped)
+        try:
+            with metrics.timer('discord_followup_seconds', action='edit'):
+                await self.message.edit(embed=self._embed(final_title))
+        except discord.HTTPException as e:
+            logger.warning(f"Could not update progress for event {self.event_id}: {e}")
+
+    async def finish(self, final_title: str):
+        """Stops refreshing and shows the final counts"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self.message:
+            await self._edit(final_title)
+
+class FuzzyNameIndex:
+    """Trigram index over normalised member names, used to suggest members for names that did not resolve"""
+    # Latin lookalikes from other scripts, plus the digits most often typed for letters
+    CONFUSABLES = str.maketrans({
+        'а': 'a', 'в': 'b', 'е': 'e', 'ё': 'e', 'к': 'k', 'м': 'm', 'н': 'h', 'о': 'o', 'р': 'p', 'с': 'c',
+        'т': 't', 'у': 'y', 'х': 'x', 'і': 'i', 'ї': 'i', 'ј': 'j', 'ѕ': 's', 'ԁ': 'd', 'һ': 'h', 'ӏ': 'l',
+        'α': 'a', 'β': 'b', 'ε': 'e', 'η': 'n', 'ι': 'i', 'κ': 'k', 'ν': 'v', 'ο': 'o', 'ρ': 'p', 'τ': 't',
+        'υ': 'u', 'χ': 'x', 'ı': 'i', 'ł': 'l', 'ø': 'o', 'đ': 'd', 'ħ': 'h', 'ɡ': 'g', '0': 'o', '1': 'l'
+    })
+    SEPARATORS = re.compile(r'[\W_]+')
+
+    def __init__(self):
+        self.members: Dict[str, Dict[int, str]] = {}  # normalised name -> {member ID: original name}
+        self.grams: Dict[str, tuple] = {}  # normalised name -> its trigrams; tuples of str are left alone by the GC
+        self.postings: Dict[str, Set[str]] = {}  # trigram -> normalised names containing it
+
+    @classmethod
+    def normalize(cls, name: str) -> str:
+        """Folds case, compatibility forms, accents, lookalike characters and separators"""
+        if name.isascii():
+            folded = name.lower()
+        else:
+            folded = unicodedata.normalize('NFKD', unicodedata.normalize('NFKC', name).casefold())
+            folded = ''.join(char for char in folded if not unicodedata.combining(char))
+        folded = folded.translate(cls.CONFUSABLES)
+        # Names made only of symbols keep them rather than normalising to nothing
+        return cls.SEPARATORS.sub('', folded) or folded.strip()
+
+    @staticmethod
+    def trigrams(key: str) -> frozenset:
+        padded = f"  {key} "
+        return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+    def build(self, names_by_member: Dict[int, list]):
+        for member_id, names in names_by_member.items():
+            self.add(member_id, names)
+
+    def add(self, member_id: int, names):
+        for name in set(names):
+            if not name:
+                continue
+            key = self.normalize(name)
+            owners = self.members.setdefault(key, {})
+            owners.setdefault(member_id, name)
+            if key not in self.grams:
+                self.grams[key] = tuple(self.trigrams(key))
+                for gram in self.grams[key]:
+                    self.postings.setdefault(gram, set()).add(key)
+
+    def remove(self, member_id: int, names):
+        for name in set(names):
+            if not name:
+                continue
+            key = self.normalize(name)
+            owners = self.members.get(key)
+            if owners is None or owners.pop(member_id, None) is None or owners:
+                continue
+            del self.members[key]
+            for gram in self.grams.pop(key):
+                bucket = self.postings[gram]
+                bucket.discard(key)
+                if not bucket:
+                    del self.postings[gram]
+
+    def suggest(self, name: str, limit: int, min_score: float = 0.0) -> list:
+        """Returns up to limit (member ID, matched name, score) tuples, best first.
+
+        The score is the Dice coefficient of the trigram sets, 1.0 when the
+        normalised names are equal. A name sharing only r of the n query
+        trigrams scores at most 2r / (n + r), so postings of the commonest
+        trigrams that cannot reach min_score on their own are not read."""
+        grams = self.trigrams(self.normalize(name))
+        size = len(grams)
+        ordered = sorted(grams, key=lambda gram: len(self.postings.get(gram, ())))
+        skipped = 0
+        while skipped < size - 1 and 2 * (skipped + 1) / (size + skipped + 1) < min_score:
+            skipped += 1
+        common = frozenset(ordered[size - skipped:])
+
+        shared = Counter()
+        for gram in ordered[:size - skipped]:
+            shared.update(self.postings.get(gram, ()))
+
+        best = {}
+        for key, count in shared.items():
+            key_grams = self.grams[key]
+            # Rule out most candidates before checking the common trigrams
+            if 2 * (count + skipped) < min_score * (size + len(key_grams)):
+                continue
+            if skipped:
+                count += len(common.intersection(key_grams))
+            score = 2 * count / (size + len(key_grams))
+            if score < min_score:
+                continue
+            for member_id, original in self.members[key].items():
+                if member_id not in best or score > best[member_id][2]:
+                    best[member_id] = (member_id, original, score)
+        return heapq.nlargest(limit, best.values(), key=lambda candidate: candidate[2])
+
+class MemberIndex:
+    """Maps member names and IDs to member IDs for one guild"""
+    # Lookup order matches the priority used when resolving a name
+    NAME_ATTRIBUTES = ('global_name', 'name', 'display_name')
+
+    def __init__(self):
+        self.guild_id = None
+        self.by_id: Set[int] = set()
+        self.by_name: Dict[str, Dict[str, list]] = {attr: {} for attr in self.NAME_ATTRIBUTES}
+        # Trigram index for suggestions, built in a worker thread on first use
+        self.fuzzy: FuzzyNameIndex = None
+        self._fuzzy_task: asyncio.Task = None
+        self._fuzzy_pending: list = []
+
+    @classmethod
+    def member_names(cls, member) -> Dict[str, str]:
+        """Returns the indexed names of a member"""
+        return {attr: getattr(member, attr) for attr in cls.NAME_ATTRIBUTES}
+
+    def build(self, guild: discord.Guild):
+        """Rebuilds the index from the guild's member cache"""
+        self.guild_id = guild.id
+        self.by_id = set()
+        self.by_name = {attr: {} for attr in self.NAME_ATTRIBUTES}
+        self.fuzzy = None
+        self._fuzzy_task = None
+        self._fuzzy_pending = []
+        USER_ID_CACHE.clear()
+        for member in guild.members:
+            self.add(member.id, self.member_names(member))
+        logger.info(f"Indexed {len(self.by_id)} members of guild {guild.id}")
+
+    def add(self, member_id: int, names: Dict[str, str]):
+        """Adds a member; when several members share a name the earliest one wins"""
+        self.by_id.add(member_id)
+        for attr, value in names.items():
+            if value:
+                self.by_name[attr].setdefault(value, []).append(member_id)
+        self._update_fuzzy('add', member_id, names)
+        # Names that previously missed may now resolve to this member
+        self._forget(None)
+
+    def remove(self, member_id: int, names: Dict[str, str]):
+        """Removes a member and any cached lookups that resolved to it"""
+        self.by_id.discard(member_id)
+        for attr, value in names.items():
+            bucket = self.by_name[attr].get(value)
+            if bucket and member_id in bucket:
+                bucket.remove(member_id)
+                if not bucket:
+                    del self.by_name[attr][value]
+        self._update_fuzzy('remove', member_id, names)
+        self._forget(str(member_id))
+
+    def rename(self, member_id: int, before: Dict[str, str], after: Dict[str, str]):
+        """Re-indexes a member whose names may have changed"""
+        if before == after:
+            return
+        self.remove(member_id, before)
+        self.add(member_id, after)
+
+    def _forget(self, user_id):
+        """Drops cached lookups that resolved to user_id"""
+        for key in [key for key, cached_id in USER_ID_CACHE.items() if cached_id == user_id]:
+            del USER_ID_CACHE[key]
+
+    def lookup(self, username: str):
+        """Returns (member ID, attribute it matched) or (None, None)"""
+        user_id = parse_user_id(username)
+        if user_id and int(user_id) in self.by_id:
+            return user_id, 'id'
+
+        # Trim special characters (@, leading/trailing spaces) from the name
+        clean_name = username.lstrip('@').strip()
+        for attr, names in self.by_name.items():
+            bucket = names.get(clean_name)
+            if bucket:
+                return str(bucket[0]), attr
+        return None, None
+
+    def _update_fuzzy(self, action: str, member_id: int, names: Dict[str, str]):
+        if self.fuzzy is not None:
+            getattr(self.fuzzy, action)(member_id, list(names.values()))
+        elif self._fuzzy_task is not None:
+            # Replayed once the index being built is swapped in
+            self._fuzzy_pending.append((action, member_id, list(names.values())))
+
+    async def fuzzy_index(self) -> FuzzyNameIndex:
+        """Returns the trigram index, building it on first use"""
+        if self.fuzzy is not None:
+            return self.fuzzy
+        if self._fuzzy_task is None:
+            self._fuzzy_task = asyncio.create_task(self._build_fuzzy())
+        # A cancelled caller must not cancel the build other callers wait for
+        return await asyncio.shield(self._fuzzy_task)
+
+    async def _build_fuzzy(self) -> FuzzyNameIndex:
+        task = asyncio.current_task()
+        names_by_member = {}
+        for names in self.by_name.values():
+            for value, member_ids in names.items():
+                for member_id in member_ids:
+                    names_by_member.setdefault(member_id, []).append(value)
+
+        # Indexing a large guild takes seconds, so it runs off the event loop
+        started = time.monotonic()
+        fuzzy = FuzzyNameIndex()
+        await asyncio.to_thread(fuzzy.build, names_by_member)
+        if self._fuzzy_task is task:
+            for action, member_id, names in self._fuzzy_pending:
+                getattr(fuzzy, action)(member_id, names)
+            self._fuzzy_pending = []
+            self.fuzzy = fuzzy
+        logger.info(f"Built name suggestion index of {len(fuzzy.members)} names in {time.monotonic() - started:.1f}s")
+        return fuzzy
+
 # Create global instances of managers
 pause_manager = PauseManager()
 distribution_manager = DistributionProgress()
+send_ledger = SendLedger()
+job_queue = JobQueue()
+engage_rate_limiter = RateLimiter(RATE_LIMIT['requests_per_second'], RATE_LIMIT['burst'])
+member_index = MemberIndex()
+history_index = HistoryIndex()
+event_cache = EventCache(EVENT_CACHE['ttl'])
+metrics = Metrics()
+metrics.gauge_function('op_send_queue_depth', lambda: sum(queue.qsize() for queue in SendEngine.active_queues))
+metrics.gauge_function('engage_rate_limiter_waiting', lambda: engage_rate_limiter.waiting)
+metrics.gauge_function('engage_rate_limit_rps', lambda: engage_rate_limiter.rate)
+
+def request_sent_trace() -> aiohttp.TraceConfig:
+    """Records whether a request left the bot, for requests passing a dict as trace_request_ctx.
+
+    The dict's 'sent' key is False from the start of the request until its
+    headers have been written, so errors before then are safe to retry."""
+    async def on_request_start(session, context, params):
+        if isinstance(context.trace_request_ctx, dict):
+            context.trace_request_ctx['sent'] = False
+
+    async def on_request_headers_sent(session, context, params):
+        if isinstance(context.trace_request_ctx, dict):
+            context.trace_request_ctx['sent'] = True
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_headers_sent.append(on_request_headers_sent)
+    return trace
+
+def create_http_session() -> aiohttp.ClientSession:
+    """Creates the keep-alive connection pool used for every Sahara and Engage request"""
+    return aiohttp.ClientSession(
+        trace_configs=[request_sent_trace()],
+        connector=aiohttp.TCPConnector(
+            limit=HTTP_POOL['max_connections'],
+            limit_per_host=HTTP_POOL['max_connections_per_host'],
+            ttl_dns_cache=HTTP_POOL['dns_cache_ttl'],
+            keepalive_timeout=HTTP_POOL['keepalive_timeout']
+        ),
+        timeout=aiohttp.ClientTimeout(
+            total=HTTP_POOL['request_timeout'],
+            connect=HTTP_POOL['connect_timeout']
+        )
+    )
 
 class OPBot(discord.Client):
     def __init__(self):
@@ -166,12 +1512,168 @@ class OPBot(discord.Client):
         intents.members = True
         super().__init__(intents=intents)
         self.tree = app_commands.CommandTree(self)
+        self.http_session: aiohttp.ClientSession = None
+        self.metrics_runner: web.AppRunner = None
+        self.loop_lag_task: asyncio.Task = None
+        self.log_relay_task: asyncio.Task = None
+        self.job_workers: list = []
+        self.shutdown_task: asyncio.Task = None
 
     async def setup_hook(self):
+        # One keep-alive connection pool shared by every Sahara and Engage request
+        self.http_session = create_http_session()
+
+        if METRICS['port']:
+            await self.start_metrics_server()
+        self.loop_lag_task = asyncio.create_task(self.measure_loop_lag())
+        if LOG_RELAY['enabled']:
+            self.log_relay_task = asyncio.create_task(self.check_logs_background_task())
+        self.job_workers = [asyncio.create_task(self.run_job_worker()) for _ in range(max(1, JOB_QUEUE['workers']))]
+        # Deploys stop the bot with SIGTERM; close() lets running distributions drain first
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, self.request_shutdown)
+        except NotImplementedError:
+            pass  # No signal handlers on Windows
+
         # Only allow commands in the specified guild
         whitelist_commands = WhitelistCommands()
         self.tree.add_command(whitelist_commands, guild=discord.Object(id=SAHARA_GUILD_ID))
-        await self.tree.sync(guild=discord.Object(id=SAHARA_GUILD_ID))
+        await self.sync_commands()
+
+    def command_hashes(self) -> Dict[str, str]:
+        """Hashes the command definitions of the guild and of the global scope"""
+        hashes = {}
+        for scope, guild in ((str(SAHARA_GUILD_ID), discord.Object(id=SAHARA_GUILD_ID)), ('global', None)):
+            commands = sorted((command.to_dict() for command in self.tree.get_commands(guild=guild)),
+                              key=lambda command: (command['name'], command.get('type', 1)))
+            payload = json.dumps({'application_id': self.application_id, 'commands': commands}, sort_keys=True)
+            hashes[scope] = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+        return hashes
+
+    async def sync_commands(self):
+        """Syncs the command tree only for scopes whose definitions changed since the last sync.
+
+        Discord rate limits syncs heavily, so restarts with unchanged
+        commands make no sync request at all."""
+        try:
+            with open(COMMAND_SYNC_FILE, 'r') as f:
+                synced_hashes = json.load(f)
+        except FileNotFoundError:
+            synced_hashes = {}
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading command sync state: {e}")
+            synced_hashes = {}
+
+        for scope, command_hash in self.command_hashes().items():
+            label = "global commands" if scope == 'global' else f"commands of guild {scope}"
+            if synced_hashes.get(scope) == command_hash:
+                logger.info(f"The {label} are unchanged, skipping sync")
+                continue
+            try:
+                guild = None if scope == 'global' else discord.Object(id=int(scope))
+                synced = await self.tree.sync(guild=guild)
+                logger.info(f"Synced {len(synced)} {label}")
+            except Exception as e:
+                logger.error(f"Failed to sync {label}: {e}")
+                continue
+            synced_hashes[scope] = command_hash
+            atomic_write_json(COMMAND_SYNC_FILE, synced_hashes)
+
+    def request_shutdown(self):
+        if self.shutdown_task is None:
+            self.shutdown_task = asyncio.create_task(self.close())
+
+    async def close(self):
+        # Running distributions take no new sends and finish those in flight, so
+        # their ledger claims are settled; their jobs stay 'running' and are
+        # queued again on the next start
+        pause_manager.stop_all()
+        job_queue.wakeup.set()
+        workers = [task for task in self.job_workers if not task.done()]
+        if workers:
+            _, pending = await asyncio.wait(workers, timeout=JOB_QUEUE['drain_timeout'])
+            if pending:
+                logger.warning(f"{len(pending)} job workers were still sending after {JOB_QUEUE['drain_timeout']}s; cancelling them")
+        for task in [self.loop_lag_task, self.log_relay_task, *self.job_workers]:
+            if task:
+                task.cancel()
+        await pause_manager.flush()
+        if self.metrics_runner:
+            await self.metrics_runner.cleanup()
+            self.metrics_runner = None
+        if self.http_session and not self.http_session.closed:
+            await self.http_session.close()
+        await super().close()
+
+    async def start_metrics_server(self):
+        """Serves metrics on http://METRICS_HOST:METRICS_PORT/metrics"""
+        app = web.Application()
+        app.router.add_get('/metrics', metrics.handle)
+        self.metrics_runner = web.AppRunner(app, access_log=None)
+        await self.metrics_runner.setup()
+        try:
+            await web.TCPSite(self.metrics_runner, METRICS['host'], METRICS['port']).start()
+            logger.info(f"Serving metrics on http://{METRICS['host']}:{METRICS['port']}/metrics")
+        except OSError as e:
+            # Metrics are optional; the bot keeps running without them
+            logger.error(f"Could not start metrics server on port {METRICS['port']}: {e}")
+            await self.metrics_runner.cleanup()
+            self.metrics_runner = None
+
+    async def run_job_worker(self):
+        """Runs queued distribution jobs one at a time until the bot closes"""
+        await self.wait_until_ready()
+        while not self.is_closed() and not pause_manager.shutting_down:
+            job = job_queue.claim_next()
+            if job is None:
+                job_queue.wakeup.clear()
+                try:
+                    await asyncio.wait_for(job_queue.wakeup.wait(), JOB_QUEUE['poll_interval'])
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            logger.info(f"Starting job #{job['id']} ({job['kind']} {job['event_id'] or ''})")
+            try:
+                status, detail = await run_job(job)
+            except Exception as e:
+                logger.error(f"Job #{job['id']} failed: {e}")
+                status, detail = 'failed', str(e)
+            if status == 'interrupted':
+                # Left 'running', so the next start queues it again
+                logger.info(f"Job #{job['id']} interrupted by shutdown")
+                continue
+            job_queue.finish(job['id'], status, detail)
+            logger.info(f"Job #{job['id']} {status}")
+
+    async def measure_loop_lag(self):
+        """Records how late the event loop wakes a sleeping task"""
+        interval = METRICS['loop_lag_interval']
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(interval)
+            metrics.observe('event_loop_lag_seconds', max(0.0, time.monotonic() - started - interval))
+
+    async def on_member_join(self, member: discord.Member):
+        if member.guild.id == member_index.guild_id:
+            member_index.add(member.id, MemberIndex.member_names(member))
+
+    async def on_member_remove(self, member: discord.Member):
+        if member.guild.id == member_index.guild_id:
+            member_index.remove(member.id, MemberIndex.member_names(member))
+
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if after.guild.id == member_index.guild_id:
+            member_index.rename(after.id, MemberIndex.member_names(before), MemberIndex.member_names(after))
+
+    async def on_user_update(self, before: discord.User, after: discord.User):
+        """Username and global name changes arrive here rather than in on_member_update."""
+        guild = self.get_guild(member_index.guild_id) if member_index.guild_id else None
+        member = guild.get_member(after.id) if guild else None
+        if member:
+            before_names = MemberIndex.member_names(before)
+            before_names['display_name'] = member.nick or before.display_name
+            member_index.rename(member.id, before_names, MemberIndex.member_names(member))
 
     async def on_guild_join(self, guild):
         """Handle when bot joins a guild."""
@@ -179,14 +1681,22 @@ class OPBot(discord.Client):
             logger.warning(f"Bot joined unauthorized guild {guild.name} ({guild.id}). Leaving...")
             await guild.leave()
 
-    async def format_log_embed(self, logs, log_type=None):
-        """Format logs into a Discord embed."""
-        embed = discord.Embed(
-            title="🔔 New Site Activity",
-            description=f"New activity detected" + (f" ({log_type})" if log_type else ""),
-            color=discord.Color.blue(),
-            timestamp=datetime.utcnow()
-        )
+    @staticmethod
+    def format_log_embeds(logs: list, missed: int = 0) -> list:
+        """Packs log entries into as few embeds as Discord allows.
+
+        Returns [(embed, seq of its last entry)]; each embed holds at most
+        25 fields and 6000 characters."""
+        embeds = []
+        embed = None
+        size = 0
+
+        def new_embed() -> discord.Embed:
+            return discord.Embed(
+                title="🔔 New Site Activity",
+                color=discord.Color.blue(),
+                timestamp=datetime.utcnow()
+            )
 
         for log in logs:
             timestamp = datetime.fromisoformat(log['timestamp'].replace('Z', '+00:00'))
@@ -207,85 +1717,117 @@ class OPBot(discord.Client):
             log_text += f"**Action:** {action}\n"
             if details:
                 log_text += f"**Details:** {details}\n"
-
-            # Add field for this log
-            embed.add_field(
-                name=f"{type_emoji} {timestamp.strftime('%Y-%m-%d %H:%M:%S')}",
-                value=log_text,
-                inline=False
-            )
-
-        return embed
+            name = f"{type_emoji} {timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
+            log_text = log_text[:1024]
+
+            if embed is None or len(embed.fields) == 25 or size + len(name) + len(log_text) > 6000:
+                embed = new_embed()
+                size = len(embed.title)
+                if missed and not embeds:
+                    embed.description = f"⚠️ {missed} entries were dropped by the server before they could be relayed"
+                    size += len(embed.description)
+                embeds.append([embed, None])
+            embed.add_field(name=name, value=log_text, inline=False)
+            size += len(name) + len(log_text)
+            embeds[-1][1] = log['seq']
+
+        return [tuple(item) for item in embeds]
+
+    @staticmethod
+    def load_log_cursor() -> dict:
+        """Returns the last relayed {'bootId', 'seq'}, or None if nothing was relayed yet"""
+        try:
+            with open(LOG_RELAY['cursor_file'], 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading log relay cursor: {e}")
+        return None
 
     async def check_logs_background_task(self):
-        """Background task to check for new logs."""
+        """Relays site activity from /api/bot/logs to the log channel.
+
+        Long-polls the server while idle and fetches pages back to back while
+        it is behind. The cursor is saved after every posted message, so a
+        restart resumes after the last relayed entry. Without a saved cursor
+        the relay starts after the server's newest entry rather than posting
+        its whole buffer."""
         await self.wait_until_ready()
-        self.log_channel = self.get_channel(LOG_CHANNEL_ID)
+        log_channel = self.get_channel(LOG_CHANNEL_ID)
 
-        if not self.log_channel:
+        if not log_channel:
             logger.error(f"Could not find log channel with ID {LOG_CHANNEL_ID}")
             return
 
-        while not self.is_closed():
-            try:
-                # Get new logs from API
-                base_url = SAHARA_API_URL.rstrip('/')
-                url = f"{base_url}/api/logs"
+        url = f"{SAHARA_API_URL.rstrip('/')}/api/bot/logs"
+        headers = {
+            'Accept': 'application/json',
+            'x-api-key': ENGAGE_API_TOKEN
+        }
+        cursor = self.load_log_cursor()
+        has_more = False
+        failures = 0
 
+        while not self.is_closed():
+            if cursor is None:
+                # Only asks for the newest seq
+                params = {'after': '0', 'limit': '1', 'wait': '0'}
+            else:
                 params = {
-                    'after': self.last_log_time.strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
-                    'limit': 10  # Fetch up to 10 new logs at a time
-                }
-
-                headers = {
-                    'Content-Type': 'application/json',
-                    'x-api-key': API_HEADERS['x-api-key']
+                    'after': str(cursor['seq']),
+                    'limit': str(LOG_RELAY['page_size']),
+                    # Only wait for new entries once the backlog is drained
+                    'wait': '0' if has_more else str(LOG_RELAY['wait'])
                 }
+                if cursor['bootId']:
+                    params['bootId'] = cursor['bootId']
 
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, params=params, headers=headers) as response:
-                        if response.status == 200:
-                            logs_data = await response.json()
-                            new_logs = logs_data.get('logs', [])
-
-                            if new_logs:
-                                # Group logs by type
-                                grouped_logs = {}
-                                for log in new_logs:
-                                    log_type = log.get('type', 'other')
-                                    if log_type not in grouped_logs:
-                                        grouped_logs[log_type] = []
-                                    grouped_logs[log_type].append(log)
-
-                                # Send embed for each type of logs
-                                for log_type, logs in grouped_logs.items():
-                                    embed = await self.format_log_embed(logs, log_type)
-                                    await self.log_channel.send(embed=embed)
-
-                                # Update last check time
-                                if new_logs:
-                                    latest_time = max(
-                                        datetime.fromisoformat(log['timestamp'].replace('Z', '+00:00'))
-                                        for log in new_logs
-                                    )
-                                    self.last_log_time = latest_time
+            try:
+                async with self.http_session.get(url, params=params, headers=headers) as response:
+                    if response.status != 200:
+                        raise RuntimeError(f"server responded with status {response.status}")
+                    page = await response.json()
+
+                if cursor is None:
+                    cursor = {'bootId': page['bootId'], 'seq': page['lastSeq']}
+                    await asyncio.to_thread(atomic_write_json, LOG_RELAY['cursor_file'], cursor)
+                    logger.info(f"Relaying site logs after entry {cursor['seq']}")
+                    failures = 0
+                    continue
+
+                if page['bootId'] != cursor['bootId']:
+                    # The server restarted and numbers entries from 1 again
+                    if cursor['bootId']:
+                        logger.info("Site log buffer was reset; relaying it from the start")
+                    cursor = {'bootId': page['bootId'], 'seq': 0}
+                    await asyncio.to_thread(atomic_write_json, LOG_RELAY['cursor_file'], cursor)
+
+                for embed, last_seq in self.format_log_embeds(page['logs'], page.get('missed', 0)):
+                    await log_channel.send(embed=embed)
+                    cursor['seq'] = last_seq
+                    await asyncio.to_thread(atomic_write_json, LOG_RELAY['cursor_file'], cursor)
+
+                has_more = page.get('hasMore', False)
+                failures = 0
+                if not page['logs']:
+                    # Keeps a server that does not hold the request from being polled in a tight loop
+                    await asyncio.sleep(LOG_RELAY['min_poll_interval'])
 
             except Exception as e:
-                logger.error(f"Error in log checking task: {e}")
-
-            # Wait before next check
-            await asyncio.sleep(30)  # Check every 30 seconds
+                failures += 1
+                delay = min(LOG_RELAY['max_retry_delay'], 2 ** failures)
+                logger.error(f"Error relaying site logs, retrying in {delay}s: {e}")
+                await asyncio.sleep(delay)
 
 client = OPBot()
 
 @client.event
 async def on_ready():
     logger.info(f'Bot is ready! Logged in as {client.user}')
-    try:
-        synced = await client.tree.sync()
-        logger.info(f"Synced {len(synced)} command(s)")
-    except Exception as e:
-        logger.error(f"Failed to sync commands: {e}")
+    guild = client.get_guild(SAHARA_GUILD_ID)
+    if guild:
+        member_index.build(guild)
 
 async def get_event_distributions(session: aiohttp.ClientSession, event_id: str):
     """Get distribution information from event."""
@@ -299,17 +1841,18 @@ async def get_event_distributions(session: aiohttp.ClientSession, event_id: str)
         url = f'{base_url}/api/events/{event_id}'
         logger.info(f"Fetching event distributions from: {url}")
 
-        async with session.get(url, headers=headers) as response:
-            if response.status == 200:
-                event_data = await response.json()
-                if not event_data:
-                    logger.error(f"Event {event_id} returned empty data")
+        with metrics.timer('sahara_request_seconds', endpoint='event'):
+            async with session.get(url, headers=headers) as response:
+                if response.status == 200:
+                    event_data = await response.json()
+                    if not event_data:
+                        logger.error(f"Event {event_id} returned empty data")
+                        return None
+                    return event_data.get('distributions', [])
+                else:
+                    error_text = await response.text()
+                    logger.error(f"Failed to get event {event_id}. Status: {response.status}, Error: {error_text}")
                     return None
-                return event_data.get('distributions', [])
-            else:
-                error_text = await response.text()
-                logger.error(f"Failed to get event {event_id}. Status: {response.status}, Error: {error_text}")
-                return None
     except ValueError:
         logger.error(f"Invalid event ID format: {event_id}")
         return None
@@ -317,75 +1860,250 @@ async def get_event_distributions(session: aiohttp.ClientSession, event_id: str)
         logger.error(f"Error getting event {event_id}: {e}")
         return None
 
-async def get_event_status(event_id: str) -> dict:
-    try:
-        base_url = SAHARA_API_URL.rstrip('/')
-        url = f"{base_url}/api/bot/events/{event_id}"
-        headers = {
-            'Content-Type': 'application/json',
-            'x-api-key': API_HEADERS['x-api-key']
-        }
-
-        logger.info(f"Fetching event status from: {url}")
-        logger.info(f"Using headers: {headers}")
+async def get_event_status(event_id: str, max_age: float = None) -> dict:
+    """Returns event data through event_cache.
+
+    max_age=0 revalidates with the server, which answers 304 when the cached
+    copy is current; the default serves copies up to EVENT_CACHE['ttl'] old."""
+    return await event_cache.get(client.http_session, event_id, max_age)
+
+async def iter_bot_events(session: aiohttp.ClientSession, status: str = None, updated_after: str = None,
+                          page_size: int = 100, summary: bool = False, listing: dict = None):
+    """Yields events from /api/bot/events one page at a time, oldest change first.
+
+    updated_after matches events whose event or distributions changed at or
+    after it. With summary=True events carry only id, title, status,
+    eventDate, updatedAt, changedAt, distributionCount and recipientCount,
+    not the name lists. A listing dict receives the serverTime of the first
+    page, the updated_after to pass to see only later changes."""
+    url = f"{SAHARA_API_URL.rstrip('/')}/api/bot/events"
+    headers = {
+        'Content-Type': 'application/json',
+        'Accept': 'application/json',
+        'x-api-key': ENGAGE_API_TOKEN
+    }
+    params = {'limit': str(page_size)}
+    if status:
+        params['status'] = status
+    if updated_after:
+        params['updatedAfter'] = updated_after
+    if summary:
+        params['view'] = 'summary'
+
+    while True:
+        with metrics.timer('sahara_request_seconds', endpoint='events'):
+            async with session.get(url, headers=headers, params=params, allow_redirects=False) as response:
+                # If server redirects request, it means endpoint is incorrect
+                if response.status in (301, 302, 303, 307, 308):
+                    redirect_url = response.headers.get('Location', 'unknown')
+                    logger.error(f"Redirection detected. Endpoint returned redirect to {redirect_url}")
+                    raise RuntimeError("received a redirect response, endpoint may be incorrect")
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
                 if response.status != 200:
                     error_text = await response.text()
-                    logger.error(f"Error getting event {event_id}. Status: {response.status}, Response: {error_text}")
-                    return None
+                    logger.error(f"Failed to fetch events. Status: {response.status}, Error: {error_text}")
+                    raise RuntimeError(f"server responded with status {response.status}")
 
-                event_data = await response.json()
-                return event_data
-    except Exception as e:
-        logger.error(f"Error getting event status: {e}")
-        return None
+                page = await response.json()
+
+        if listing is not None:
+            listing.setdefault('serverTime', page.get('serverTime'))
+        for event in page.get('data') or []:
+            yield event
 
-async def send_op_to_user(session: aiohttp.ClientSession, user_id: str, points: int, reason: str = '', event_id: int = 0, delay: float = 0.5) -> bool:
-    """Send OP to user through Engage API."""
+        if not page.get('nextCursor'):
+            return
+        params['cursor'] = page['nextCursor']
+
+async def send_op_bulk(session: aiohttp.ClientSession, user_ids: list, points: int,
+                       acquired: bool = False, ledger_keys: list = None) -> Dict[str, bool]:
+    """Credits several users with the same points in one request to BULK_SEND['url'].
+
+    The proxy makes one Engage call per user, so a batch takes one rate
+    limiter token per user and asks the proxy to pace its calls at the
+    limiter's current rate; acquired tells that the caller already took
+    those tokens. Returns {user_id: outcome}: True if credited, False if
+    certainly not credited, so a single send may follow, and None if the
+    user may have been credited without an answer. If cancelled before the
+    request was sent, the send_ledger claims in ledger_keys are released."""
+    headers = {
+        'x-api-key': ENGAGE_API_TOKEN,
+        'Content-Type': 'application/json'
+    }
+    request = {}
+    in_flight = False  # The request may have reached the proxy and is unanswered
     try:
-        # Add delay to avoid rate limiting
-        await asyncio.sleep(delay)
+        if not acquired:
+            await engage_rate_limiter.acquire(len(user_ids))
+        logger.debug("Sending %d OP to %d users in one batch", points, len(user_ids))
+        body = {'points': points, 'userIds': user_ids, 'requestsPerSecond': engage_rate_limiter.rate}
+        timeout = aiohttp.ClientTimeout(total=BULK_SEND['request_timeout'], connect=HTTP_POOL['connect_timeout'])
+        in_flight = True
+        with metrics.timer('engage_request_seconds', endpoint='bulk'):
+            async with session.post(BULK_SEND['url'], headers=headers, json=body, timeout=timeout,
+                                    trace_request_ctx=request) as response:
+                metrics.inc('engage_requests_total', endpoint='bulk', status=response.status)
+                if response.status == 429:
+                    engage_rate_limiter.slow_down(parse_retry_after(response.headers.get('Retry-After')))
+                if response.status != 200:
+                    error_text = await response.text()
+                    # The proxy checks a batch before crediting anyone; other failures may follow credits
+                    rejected = 400 <= response.status < 500 and response.status != 408
+                    logger.error("Bulk send failed%s. Status: %s, Response: %s",
+                                 "" if rejected else ", outcome unknown", response.status, error_text)
+                    return {user_id: False if rejected else None for user_id in user_ids}
+                data = await response.json()
+    except asyncio.CancelledError:
+        # Sessions without request_sent_trace leave 'sent' unset; assume the worst
+        if ledger_keys and not (in_flight and request.get('sent', True)):
+            for ledger_key in ledger_keys:
+                send_ledger.release(*ledger_key)
+        raise
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        metrics.inc('engage_requests_total', endpoint='bulk', status='error')
+        never_sent = isinstance(e, aiohttp.ClientConnectorError) or not request.get('sent', True)
+        logger.error("Error sending OP batch of %d users%s: %s", len(user_ids),
+                     "" if never_sent else ", outcome unknown", str(e) or type(e).__name__)
+        return {user_id: False if never_sent else None for user_id in user_ids}
+    except Exception as e:
+        logger.error("Error sending OP batch of %d users, outcome unknown: %s", len(user_ids), e)
+        return {user_id: None for user_id in user_ids}
+
+    results = {}
+    retry_after = None
+    for item in data.get('results', []):
+        user_id = str(item.get('userId'))
+        if item.get('success'):
+            results[user_id] = True
+        elif item.get('status'):
+            # Engage answered, or the proxy skipped the call after a 429
+            results[user_id] = False
+        else:
+            # The proxy's own call failed; Engage may still have credited the user
+            results[user_id] = None
+        if item.get('status') == 429:
+            retry_after = max(retry_after or 0, parse_retry_after(item.get('retryAfter')))
+
+    if retry_after is not None:
+        engage_rate_limiter.slow_down(retry_after)
+    else:
+        engage_rate_limiter.speed_up()
+    credited = sum(1 for user_id in user_ids if results.get(user_id))
+    if credited < len(user_ids):
+        logger.warning("Bulk send credited %d/%d users; sending the rest one by one unless their outcome is unknown",
+                       credited, len(user_ids))
+    return results
+
+def parse_retry_after(value: str) -> float:
+    """Converts a Retry-After header (seconds or HTTP date) into seconds to wait."""
+    if not value:
+        return 0
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+    except (TypeError, ValueError):
+        return 0
 
-        # Form URL with parameters
-        url = f"{os.getenv('ENGAGE_API_URL')}?userId={user_id}&points={points}"
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (1-based)."""
+    return random.uniform(0, min(RETRY_POLICY['max_delay'], RETRY_POLICY['base_delay'] * 2 ** (attempt - 1)))
+
+async def send_op_to_user(session: aiohttp.ClientSession, user_id: str, points: int, reason: str = '', event_id: int = 0,
+                          acquired: bool = False, ledger_key: tuple = None) -> Tuple[bool, bool]:
+    """Send OP to user through Engage API.
+
+    Transient error responses, and errors before the request was sent, are
+    retried with backoff. Returns (success, retryable), where retryable tells
+    whether a failure was transient. success is None when the request may
+    have reached Engage but no answer came back: the credit GET is not
+    idempotent, so it is neither retried nor reported as a plain failure.
+
+    acquired tells that the caller already took the rate limiter token of
+    the first attempt. If cancelled while no request is awaiting an answer,
+    the send_ledger claim ledger_key is released."""
+    # Form URL with parameters
+    url = f"{os.getenv('ENGAGE_API_URL')}?userId={user_id}&points={points}"
+
+    headers = {
+        'x-api-key': os.getenv('ENGAGE_API_TOKEN'),
+        'Content-Type': 'application/json'
+    }
+
+    request = {}
+    in_flight = False  # A request may have reached Engage and is unanswered
+    try:
+        for attempt in range(1, RETRY_POLICY['max_attempts'] + 1):
+            retry_after = 0
+            request = {}
+            try:
+                # Wait for a free slot in the Engage request budget
+                if attempt > 1 or not acquired:
+                    await engage_rate_limiter.acquire()
 
-        headers = {
-            'x-api-key': os.getenv('ENGAGE_API_TOKEN'),
-            'Content-Type': 'application/json'
-        }
+                logger.debug("Sending %d OP to user %s: %s", points, user_id, url)
 
-        logger.info(f"Sending {points} OP to user {user_id}")
-        logger.debug(f"Request URL: {url}")
-        logger.debug(f"Headers: {headers}")
+                in_flight = True
+                with metrics.timer('engage_request_seconds', endpoint='single'):
+                    async with session.get(url, headers=headers, trace_request_ctx=request) as response:
+                        response_text = await response.text()
+                        # Only a 200 credits the user
+                        in_flight = response.status == 200
+                        metrics.inc('engage_requests_total', endpoint='single', status=response.status)
+                        logger.debug("Response status: %s, body: %s", response.status, response_text)
 
-        async with session.get(url, headers=headers) as response:
-            response_text = await response.text()
-            logger.debug(f"Response status: {response.status}")
-            logger.debug(f"Response body: {response_text}")
+                        if response.status == 200:
+                            engage_rate_limiter.speed_up()
+                            logger.debug("Successfully sent %d OP to user %s", points, user_id)
+                            return True, False
+
+                        message = API_ERROR_MESSAGES.get(response.status, response_text)
+                        if response.status not in RETRY_POLICY['transient_statuses']:
+                            logger.error("Failed to send OP to user %s. Status: %s, Response: %s", user_id, response.status, message)
+                            return False, False
+
+                        logger.warning("Attempt %d to send OP to user %s failed. Status: %s, Response: %s",
+                                       attempt, user_id, response.status, message)
+                        if response.status == 429:
+                            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                            engage_rate_limiter.slow_down(retry_after)
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                metrics.inc('engage_requests_total', endpoint='single', status='error')
+                # Sessions without request_sent_trace leave 'sent' unset; assume the worst
+                if not isinstance(e, aiohttp.ClientConnectorError) and request.get('sent', True):
+                    logger.error("Outcome of sending %d OP to user %s is unknown: %s", points, user_id, str(e) or type(e).__name__)
+                    return None, False
+                in_flight = False
+                logger.warning("Attempt %d to send OP to user %s failed before it was sent: %s",
+                               attempt, user_id, str(e) or type(e).__name__)
+            except Exception as e:
+                logger.error("Error sending OP to user %s: %s", user_id, e)
+                return False, False
 
-            if response.status == 200:
-                logger.info(f"Successfully sent {points} OP to user {user_id}")
-                return True
-            else:
-                logger.error(f"Failed to send OP. Status: {response.status}, Response: {response_text}")
-                return False
+            if attempt < RETRY_POLICY['max_attempts']:
+                await asyncio.sleep(max(retry_after, backoff_delay(attempt)))
+    except asyncio.CancelledError:
+        if ledger_key and not (in_flight and request.get('sent', True)):
+            send_ledger.release(*ledger_key)
+        raise
 
-    except Exception as e:
-        logger.error(f"Error sending OP to user {user_id}: {str(e)}")
-        return False
+    logger.error("Giving up sending OP to user %s after %d attempts", user_id, RETRY_POLICY['max_attempts'])
+    return False, True
 
 async def update_event_status(session: aiohttp.ClientSession, event_id: str, status: str) -> bool:
     """Updates the event status via API."""
     try:
         # Log initial parameters
-        logger.info(f"Starting status update for event {event_id} to status {status}")
+        logger.info("Updating event %s status to %s", event_id, status)
 
         # Form URL and remove double slashes
         base_url = SAHARA_API_URL.rstrip('/')
         full_url = f'{base_url}/api/bot/events/{event_id}'
-        logger.info(f"Request URL: {full_url}")
+        logger.debug("Request URL: %s", full_url)
 
         # Prepare headers and data (use the same as in test_api.js)
         headers = {
@@ -399,74 +2117,276 @@ async def update_event_status(session: aiohttp.ClientSession, event_id: str, sta
             'changes': f'Status updated to {status}'
         }
 
-        # Log headers and data
-        logger.info(f"Request headers: {headers}")
-        logger.info(f"Request data: {update_data}")
+        logger.debug("Request data: %s", update_data)
 
         # Make request with timeout
-        async with session.put(
-            full_url,
-            headers=headers,
-            json=update_data,
-            timeout=30
-        ) as response:
-            # Get response
-            response_text = await response.text()
-            logger.info(f"Response status: {response.status}")
-            logger.info(f"Response body: {response_text}")
-
-            if response.status == 200:
-                logger.info(f"Successfully updated event {event_id} status to {status}")
-                return True
-
-            logger.error(f"Failed to update status. Status code: {response.status}")
-            logger.error(f"Error response: {response_text}")
-            return False
+        with metrics.timer('sahara_request_seconds', endpoint='update_status'):
+            async with session.put(
+                full_url,
+                headers=headers,
+                json=update_data,
+                timeout=30
+            ) as response:
+                # Get response
+                response_text = await response.text()
+                logger.debug("Response status: %s, body: %s", response.status, response_text)
+
+                if response.status == 200:
+                    event_cache.invalidate(event_id)
+                    logger.info("Successfully updated event %s status to %s", event_id, status)
+                    return True
+
+                logger.error("Failed to update event %s status. Status: %s, Response: %s", event_id, response.status, response_text)
+                return False
 
     except Exception as e:
         logger.error(f"Error updating event status: {str(e)}")
         return False
 
+def parse_user_id(username: str) -> str:
+    """Returns the ID from a raw ID or a <@mention>, or None for plain names."""
+    if username.isdigit():
+        return username
+    match = re.fullmatch(r'<@!?(\d+)>', username)
+    return match.group(1) if match else None
+
 async def get_user_id_by_name(guild: discord.Guild, username: str) -> str:
     """Gets the Discord ID of a user by their name or ID."""
     try:
         # Trim whitespace from the name
         username = username.strip()
 
-        # If ID is passed directly
-        if username.isdigit():
-            # Check if a user with this ID exists
-            member = guild.get_member(int(username))
-            if member:
-                logger.info(f"Found user by ID: {username}")
-                return username
-
-        # Trim special characters (@, leading/trailing spaces) from the name
-        clean_name = username.lstrip('@').strip()
+        if username in USER_ID_CACHE:
+            metrics.inc('name_resolution_total', source='cache', result='hit' if USER_ID_CACHE[username] else 'miss')
+            return USER_ID_CACHE[username]
 
-        # First, search for an exact match by global_name
-        member = discord.utils.get(guild.members, global_name=clean_name)
-        if member:
-            logger.info(f"Found user by global_name: {clean_name} -> {member.id}")
-            return str(member.id)
+        if member_index.guild_id != guild.id:
+            member_index.build(guild)
 
-        # Then, search by username
-        member = discord.utils.get(guild.members, name=clean_name)
-        if member:
-            logger.info(f"Found user by username: {clean_name} -> {member.id}")
-            return str(member.id)
+        user_id, matched_by = member_index.lookup(username)
+        USER_ID_CACHE[username] = user_id
+        metrics.inc('name_resolution_total', source='index', result='hit' if user_id else 'miss')
+        if user_id:
+            logger.debug("Found user by %s: %s -> %s", matched_by, username, user_id)
+            return user_id
 
-        # If not found, log an error
-        logger.error(f"Could not find user with name/id: {username}")
+        # Unresolved names are counted per event by resolve_event_recipients
+        logger.debug("Could not find user with name/id: %s", username)
         return None
 
     except Exception as e:  
         logger.error(f"Error getting user ID for {username}: {str(e)}")
         return None
 
+async def resolve_event_recipients(guild: discord.Guild, event_id: str, distributions: list) -> dict:
+    """Resolves every name list of an event into a flat list of sends.
+
+    Each distinct name is looked up once across all distributions. Repeated
+    users within one distribution are sent to once; users listed in several
+    distributions keep one send per distribution and are reported.
+
+    Sends are keyed by points and by how many earlier distributions of the
+    event gave the user the same points, never by distribution id: the site
+    re-creates every distribution, with new ids, whenever an event is edited."""
+    names_by_dist = []
+    unique_names = set()
+    for dist in distributions:
+        names = [name.strip() for name in dist.get('nameList', '').split('\n') if name.strip()]
+        names_by_dist.append(names)
+        unique_names.update(names)
+
+    resolved = {name: await get_user_id_by_name(guild, name) for name in unique_names}
+    suggestions, auto_accepted = await suggest_unresolved_names(guild, resolved)
+
+    plan = {
+        'jobs': [],
+        'total_users': sum(len(names) for names in names_by_dist),
+        'unresolved': {},
+        'not_in_server': {},
+        'duplicates': 0,
+        'multi_distribution': {},
+        'suggestions': suggestions,
+        'auto_accepted': auto_accepted
+    }
+    dists_by_user = {}
+    occurrences = {}  # (user_id, points) -> distributions so far giving the user those points
+    for dist_index, (dist, names) in enumerate(zip(distributions, names_by_dist), 1):
+        points = dist.get('xpAmount', 0)
+        seen = set()
+        for username in names:
+            user_id = resolved[username]
+            if not user_id:
+                # Well-formed IDs that are not members have left the server
+                bucket = 'not_in_server' if parse_user_id(username) else 'unresolved'
+                plan[bucket].setdefault(points, []).append(username)
+                continue
+
+            if user_id in seen:
+                plan['duplicates'] += 1
+                continue
+            seen.add(user_id)
+            dists_by_user.setdefault(user_id, []).append(dist_index)
+            occurrence = occurrences.get((user_id, points), 0) + 1
+            occurrences[(user_id, points)] = occurrence
+            # Stable across runs and event edits, so a resumed distribution can skip completed users
+            dist_key = f"{points}:{occurrence}"
+
+            plan['jobs'].append({
+                'event_id': event_id,
+                'dist_index': dist_index,
+                'dist_key': dist_key,
+                'progress_key': f"{dist_key}:{user_id}",
+                'user_id': user_id,
+                'username': username,
+                'points': points
+            })
+
+    plan['multi_distribution'] = {
+        user_id: dist_indexes for user_id, dist_indexes in dists_by_user.items() if len(dist_indexes) > 1
+    }
+    logger.info("Event %s: %d sends planned for %d names, %d unresolved, %d not in server, %d auto-matched",
+                event_id, len(plan['jobs']), plan['total_users'],
+                sum(len(users) for users in plan['unresolved'].values()),
+                sum(len(users) for users in plan['not_in_server'].values()),
+                len(auto_accepted))
+    return plan
+
+async def suggest_unresolved_names(guild: discord.Guild, resolved: Dict[str, str]) -> Tuple[dict, dict]:
+    """Finds the closest members for names that did not resolve.
+
+    Returns ({name: candidates}, {name: accepted candidate}). With
+    NAME_AUTO_ACCEPT set, a name whose best candidate reaches it and beats
+    the runner-up is resolved in place to that member."""
+    suggestions, auto_accepted = {}, {}
+    top_k = NAME_SUGGESTIONS['top_k']
+    threshold = NAME_SUGGESTIONS['auto_accept']
+    # IDs that are not members have left the server; there is nothing to suggest
+    unresolved = sorted(name for name, user_id in resolved.items() if not user_id and not parse_user_id(name))
+    if not unresolved or (top_k <= 0 and threshold <= 0):
+        return suggestions, auto_accepted
+    if member_index.guild_id != guild.id:
+        member_index.build(guild)
+
+    fuzzy = await member_index.fuzzy_index()
+    for name in unresolved:
+        # The runner-up is needed to tell a clear best match from a tie
+        candidates = fuzzy.suggest(name.lstrip('@').strip(), max(top_k, 2), NAME_SUGGESTIONS['min_score'])
+        if not candidates:
+            continue
+        best = candidates[0]
+        runner_up = candidates[1][2] if len(candidates) > 1 else 0
+        if threshold > 0 and best[2] >= threshold and best[2] > runner_up:
+            resolved[name] = str(best[0])
+            auto_accepted[name] = best
+            logger.info("Auto-matched %s to %s (%s, %.2f)", name, best[1], best[0], best[2])
+        elif top_k > 0:
+            suggestions[name] = candidates[:top_k]
+    metrics.inc('name_suggestions_total', len(suggestions), result='suggested')
+    metrics.inc('name_suggestions_total', len(auto_accepted), result='auto_accepted')
+    return suggestions, auto_accepted
+
+def format_suggestions(suggestions: Dict[str, list], limit: int) -> str:
+    """Formats {name: candidates} for an embed field, listing at most limit names."""
+    lines = [
+        f"`{name}` → " + ", ".join(f"<@{member_id}> ({score:.0%})" for member_id, _, score in candidates)
+        for name, candidates in list(suggestions.items())[:limit]
+    ]
+    if len(suggestions) > limit:
+        lines.append(f"…and {len(suggestions) - limit} more in the results file")
+    return "\n".join(lines)[:1024]  # Discord limit
+
+def format_auto_accepted(auto_accepted: Dict[str, tuple], limit: int) -> str:
+    """Formats {name: accepted candidate} for an embed field."""
+    lines = [
+        f"`{name}` → <@{member_id}> ({score:.0%})"
+        for name, (member_id, _, score) in list(auto_accepted.items())[:limit]
+    ]
+    if len(auto_accepted) > limit:
+        lines.append(f"…and {len(auto_accepted) - limit} more")
+    return "\n".join(lines)[:1024]  # Discord limit
+
+def format_name_groups(groups: Dict[int, list]) -> str:
+    """Formats {points: [names]} for an embed field, trimmed to Discord's limit."""
+    text = []
+    for points, users in groups.items():
+        text.append(f"{points} OP\n```{chr(10).join(users)}```")
+    return "\n".join(text)[:1024]  # Discord limit
+
+def build_results_file(event_id: str, sent_users: Dict[int, list], failed_users: Dict[int, list],
+                       not_in_server: Dict[int, list], unknown_users: Dict[int, list] = None,
+                       suggestions: Dict[str, list] = None) -> discord.File:
+    """Lists every recipient of a distribution in a text attachment."""
+    lines = []
+    for heading, groups in (("Sent", sent_users), ("Failed", failed_users), ("Not in server", not_in_server),
+                            ("Outcome unknown", unknown_users or {})):
+        for points, users in groups.items():
+            lines.append(f"# {heading} - {points} OP ({len(users)})")
+            lines.extend(users)
+            lines.append("")
+    if suggestions:
+        lines.append(f"# Suggestions for unresolved names ({len(suggestions)})")
+        for name, candidates in suggestions.items():
+            lines.append(f"{name} -> " + ", ".join(
+                f"{matched} ({member_id}, {score:.0%})" for member_id, matched, score in candidates
+            ))
+        lines.append("")
+    return discord.File(io.BytesIO("\n".join(lines).encode('utf-8')), filename=f"event_{event_id}_results.txt")
+
+def build_dry_run_embed(event_id: str, event_data: dict, plan: dict) -> discord.Embed:
+    """Describes what a distribution would send without sending anything."""
+    embed = discord.Embed(
+        title="🧪 Distribution Dry Run",
+        description="No OP has been sent.",
+        color=discord.Color.blurple()
+    )
+    embed.add_field(name="Event #", value=event_id, inline=True)
+    embed.add_field(name="Event Title", value=event_data.get('title'), inline=True)
+    embed.add_field(name="Requestor", value=f"{event_data.get('requestor')}", inline=True)
+
+    sends_by_dist = {}
+    for job in plan['jobs']:
+        sends_by_dist[job['dist_index']] = sends_by_dist.get(job['dist_index'], 0) + 1
+    plan_text = []
+    for dist_index, dist in enumerate(event_data.get('distributions', []), 1):
+        plan_text.append(f"#{dist_index}: {dist.get('xpAmount', 0)} OP × {sends_by_dist.get(dist_index, 0)} users")
+    embed.add_field(name="Distributions", value="\n".join(plan_text)[:1024] or "None", inline=False)
+
+    total_op = sum(job['points'] for job in plan['jobs'])
+    stats_text = f"📨 Sends planned: {len(plan['jobs'])}/{plan['total_users']}\n"
+    stats_text += f"💰 Total OP: {total_op}\n"
+    stats_text += f"❓ Unresolved: {sum(len(users) for users in plan['unresolved'].values())}\n"
+    if plan['auto_accepted']:
+        stats_text += f"🤖 Auto-matched: {len(plan['auto_accepted'])}\n"
+    stats_text += f"⚠️ Not in server: {sum(len(users) for users in plan['not_in_server'].values())}\n"
+    stats_text += f"🔁 Duplicates skipped: {plan['duplicates']}\n"
+    stats_text += f"👥 In several distributions: {len(plan['multi_distribution'])}"
+    embed.add_field(name="Statistics", value=stats_text, inline=False)
+
+    if plan['unresolved']:
+        embed.add_field(name="Unresolved Names", value=format_name_groups(plan['unresolved']), inline=False)
+    if plan['suggestions']:
+        embed.add_field(name="Did You Mean",
+                        value=format_suggestions(plan['suggestions'], NAME_SUGGESTIONS['shown']), inline=False)
+    if plan['auto_accepted']:
+        embed.add_field(name="Auto-matched Names",
+                        value=format_auto_accepted(plan['auto_accepted'], NAME_SUGGESTIONS['shown']), inline=False)
+    if plan['not_in_server']:
+        embed.add_field(name="Users Not in Server", value=format_name_groups(plan['not_in_server']), inline=False)
+    if plan['multi_distribution']:
+        multi_text = "\n".join(
+            f"<@{user_id}>: distributions {', '.join(f'#{index}' for index in dist_indexes)}"
+            for user_id, dist_indexes in plan['multi_distribution'].items()
+        )
+        embed.add_field(name="Users in Several Distributions", value=multi_text[:1024], inline=False)
+
+    return embed
+
 @client.tree.command(name="sendop", description="Send OP to users from event", guild=discord.Object(id=SAHARA_GUILD_ID))
-@app_commands.describe(event_id="Event ID (numbers only)")
-async def send_op_command(interaction: discord.Interaction, event_id: str):
+@app_commands.describe(
+    event_id="Event ID (numbers only)",
+    dry_run="Show who would receive OP without sending anything"
+)
+async def send_op_command(interaction: discord.Interaction, event_id: str, dry_run: bool = False):
     try:
         # Check if command is used in the correct guild
         if interaction.guild_id != SAHARA_GUILD_ID:
@@ -480,7 +2400,7 @@ async def send_op_command(interaction: discord.Interaction, event_id: str):
             await interaction.followup.send("You are not authorized to use this command.", ephemeral=True)
             return
 
-        if pause_manager.is_paused(event_id):
+        if not dry_run and pause_manager.is_paused(event_id):
             await interaction.followup.send(
                 embed=discord.Embed(
                     title="⏸️ Event Paused",
@@ -492,7 +2412,8 @@ async def send_op_command(interaction: discord.Interaction, event_id: str):
             )
             return
 
-        event_data = await get_event_status(event_id)
+        # Always confirm the status with the server; an unchanged event costs a 304
+        event_data = await get_event_status(event_id, max_age=0)
         if not event_data:
             await interaction.followup.send(f"❌ Cannot distribute OP: Unable to get status for Event #{event_id}", ephemeral=True)
             return
@@ -511,13 +2432,15 @@ async def send_op_command(interaction: discord.Interaction, event_id: str):
 
         # Format the date in the required format
         event_date = datetime.fromisoformat(event_data.get('eventDate').replace('Z', '+00:00')).strftime('%Y-%m-%d')
-        
-        success, summary_message = await process_single_event(interaction, event_id, interaction.channel)
 
-        if not success and pause_manager.is_paused(event_id):
+        if dry_run:
+            plan = await resolve_event_recipients(interaction.guild, event_id, distributions)
+            await interaction.followup.send(embed=build_dry_run_embed(event_id, event_data, plan))
             return
-        elif not success:
-            await interaction.followup.send("❌ Failed to process event", ephemeral=True)
+
+        # A job worker runs the distribution and reports to this channel
+        job_id, created = job_queue.enqueue('event', event_id, interaction.channel_id, interaction.user.id)
+        await interaction.followup.send(format_job_queued(job_id, created, f"Event #{event_id}"))
 
     except Exception as e:
         logger.error(f"Error in send_op_command: {str(e)}")
@@ -546,13 +2469,13 @@ async def set_status_command(interaction: discord.Interaction, event_id: str, st
     try:
         await interaction.response.send_message(f"Updating event {event_id} status to {status.value}...")
 
-        async with aiohttp.ClientSession() as session:
-            success = await update_event_status(session, event_id, status.value)
+        session = client.http_session
+        success = await update_event_status(session, event_id, status.value)
 
-            if success:
-                await interaction.followup.send(f"✅ Successfully updated event {event_id} status to {status.value}", ephemeral=True)
-            else:
-                await interaction.followup.send(f"❌ Failed to update event {event_id} status")
+        if success:
+            await interaction.followup.send(f"✅ Successfully updated event {event_id} status to {status.value}", ephemeral=True)
+        else:
+            await interaction.followup.send(f"❌ Failed to update event {event_id} status")
 
     except Exception as e:
         logger.error(f"Error in set_status_command: {e}")
@@ -648,13 +2571,22 @@ async def resume_distribution(interaction: discord.Interaction, event_id: str):
                     inline=False
                 )
 
+            if pause_manager.is_running(event_id):
+                # The paused run continues by itself once its sends in flight finish
+                embed.add_field(
+                    name="Still Stopping",
+                    value="The paused run is finishing its sends in flight; the distribution continues automatically once they are done.",
+                    inline=False
+                )
+
             await interaction.response.send_message(embed=embed)
 
             # Automatically continue distribution
-            if progress:
-                await process_single_event(interaction, event_id, interaction.channel)
-            else:
-                embed = discord.Embed(
+            if progress and not pause_manager.is_running(event_id):
+                job_id, created = job_queue.enqueue('event', event_id, interaction.channel_id, interaction.user.id)
+                await interaction.followup.send(format_job_queued(job_id, created, f"Event #{event_id}"))
+        else:
+            embed = discord.Embed(
                 title="ℹ️ Not Paused",
                 description=f"Event #{event_id} is not currently paused.",
                 color=discord.Color.blue()
@@ -667,11 +2599,69 @@ async def resume_distribution(interaction: discord.Interaction, event_id: str):
             ephemeral=True
         )
 
-async def process_single_event(interaction: discord.Interaction, event_id: str, log_channel):
+@client.tree.command(name="cancel", description="Stop a running OP distribution", guild=discord.Object(id=SAHARA_GUILD_ID))
+@app_commands.describe(event_id="Event ID to stop")
+async def cancel_distribution(interaction: discord.Interaction, event_id: str):
+    """Stops the running distribution of an event after the sends in flight finish."""
+    if interaction.guild_id != SAHARA_GUILD_ID:
+        await interaction.response.send_message("This command can only be used in the authorized server.", ephemeral=True)
+        return
+
+    if interaction.user.id not in AUTHORIZED_USERS:
+        await interaction.response.send_message(
+            "You are not authorized to use this command.",
+            ephemeral=True
+        )
+        return
+
+    if pause_manager.cancel_event(event_id):
+        embed = discord.Embed(
+            title="⏹️ Cancelling Distribution",
+            description=f"Distribution for Event #{event_id} will stop once the sends in flight finish.",
+            color=discord.Color.orange()
+        )
+    else:
+        embed = discord.Embed(
+            title="ℹ️ Not Running",
+            description=f"No distribution is running for Event #{event_id}.",
+            color=discord.Color.blue()
+        )
+    await interaction.response.send_message(embed=embed)
+
+async def process_single_event(guild: discord.Guild, channel, event_id: str, event_data: dict = None):
+    """Distributes OP for one event, reporting to channel.
+
+    Runs from a job worker, not a command, so it does not depend on an
+    interaction token. event_data is fetched unless the caller has it.
+    A run that stopped for a pause lifted before it finished stopping is
+    started again."""
+    while True:
+        success, summary_message = await run_event_distribution(guild, channel, event_id, event_data)
+        # Checked right after the run unregistered, so a later /resume queues a job instead
+        resumed = pause_manager.take_resumed(event_id)
+        if success or not resumed or pause_manager.shutting_down:
+            return success, summary_message
+        logger.info(f"Event {event_id} was resumed while stopping; running it again")
+        event_data = None
+
+async def run_event_distribution(guild: discord.Guild, channel, event_id: str, event_data: dict = None):
+    """One run of process_single_event, from planning to the summary"""
+    # Registered before the first await, so two jobs for one event cannot both start
+    stop_signal = pause_manager.start_run(event_id)
+    if stop_signal is None:
+        await channel.send(f"ℹ️ Distribution for Event #{event_id} is already running")
+        return False, None
+
     try:
-        event_data = await get_event_status(event_id)
+        if event_data is None:
+            event_data = await get_event_status(event_id, max_age=0)
         if not event_data:
-            await interaction.followup.send(f"❌ Failed to get event {event_id} data", ephemeral=True)
+            await channel.send(f"❌ Failed to get event {event_id} data")
+            return False, None
+
+        # The job may have waited in the queue while the event was changed on the site
+        if event_data.get('status', '').lower() != 'pending':
+            await channel.send(f"❌ Cannot distribute OP: Event #{event_id} is not in Pending status (current status: {event_data.get('status')})")
             return False, None
 
         # Format the date in the required format
@@ -681,6 +2671,7 @@ async def process_single_event(interaction: discord.Interaction, event_id: str,
         successful_sends = 0
         failed_users = {}
         not_in_server = {}
+        unknown_users = {}
 
         # Create initial embed in the new style
         start_embed = discord.Embed(
@@ -692,62 +2683,104 @@ async def process_single_event(interaction: discord.Interaction, event_id: str,
         start_embed.add_field(name="Requestor", value=f"{event_data.get('requestor')}", inline=True)
         start_embed.add_field(name="Event Date", value=event_date, inline=False)
 
-        await interaction.followup.send(embed=start_embed)
-
-        # Create session for HTTP requests
-        async with aiohttp.ClientSession() as session:
-            # Process each distribution
-            distributions = event_data.get('distributions', [])
-            for dist_index, dist in enumerate(distributions, 1):
-                points = dist.get('xpAmount', 0)
-                name_list = dist.get('nameList', '').split('\n')
-
-                for username in name_list:
-                    if not username.strip():
-                        continue
-
-                    total_users += 1
-                    # Get Discord ID of the user
-                    user_id = await get_user_id_by_name(interaction.guild, username.strip())
-
-                    if not user_id:
-                        logger.error(f"Could not find user ID for username: {username}")
-                        if points not in failed_users:
-                            failed_users[points] = []
-                        failed_users[points].append(username.strip())
-                        continue
-
-                    # Check if the user is in the server
-                    member = interaction.guild.get_member(int(user_id))
-                    if not member:
-                        logger.error(f"User {username} ({user_id}) is not in the server")
-                        if points not in not_in_server:
-                            not_in_server[points] = []
-                        not_in_server[points].append(username.strip())
-                        continue
-
-                    # Send points
-                    success = await send_op_to_user(
-                        session=session,
-                        user_id=user_id,
-                        points=points,
-                        reason=f"Event #{event_id}",
-                        event_id=int(event_id)
-                    )
-
-                    if success:
-                        successful_sends += 1
-                        logger.info(f"Successfully sent {points} OP to {username} ({user_id})")
-                        # Send message to channel about successful send
-                        await interaction.followup.send(f"✅ Sent {points} OP to {member.mention}")
-                    else:
-                        if points not in failed_users:
-                            failed_users[points] = []
-                        failed_users[points].append(username.strip())
-                        logger.error(f"Failed to send {points} OP to {username} ({user_id})")
+        with metrics.timer('discord_followup_seconds', action='send'):
+            await channel.send(embed=start_embed)
+
+        # Use the shared session for HTTP requests
+        session = client.http_session
+        # Resolve every recipient before anything is sent
+        plan = await resolve_event_recipients(guild, event_id, event_data.get('distributions', []))
+        total_users = plan['total_users']
+        for points, users in plan['unresolved'].items():
+            failed_users.setdefault(points, []).extend(users)
+        for points, users in plan['not_in_server'].items():
+            not_in_server.setdefault(points, []).extend(users)
+
+        sent_users = {}
+
+        # Skip users that already received OP before an interruption
+        if distribution_manager.get_progress(event_id) is None:
+            distribution_manager.start_distribution(event_id, event_data.get('distributions', []))
+        # and users the send ledger shows were credited by any earlier run
+        jobs = [
+            job for job in plan['jobs']
+            if not distribution_manager.is_completed(event_id, job['progress_key'])
+            and not send_ledger.is_sent(str(event_id), job['dist_key'], job['user_id'])
+        ]
+        already_sent = len(plan['jobs']) - len(jobs)
+        # Earlier sends that may have credited the user wait for an operator, not for this run
+        unknown_keys = {(distribution, user_id) for _, distribution, user_id, _ in send_ledger.unknown_credits(str(event_id))}
+        for job in jobs:
+            if (job['dist_key'], job['user_id']) in unknown_keys:
+                unknown_users.setdefault(job['points'], []).append(job['username'])
+        jobs = [job for job in jobs if (job['dist_key'], job['user_id']) not in unknown_keys]
+        if already_sent:
+            logger.info(f"Resuming event {event_id}: skipping {already_sent} users who already received OP")
+
+        reporter = ProgressReporter(event_id, event_data.get('title'), len(jobs))
+        await reporter.start(channel.send)
+
+        async def on_result(job, success):
+            nonlocal successful_sends, already_sent
+            points = job['points']
+            reporter.record(success)
+            if success is None:
+                # Another run credited this user between planning and sending
+                already_sent += 1
+                distribution_manager.update_progress(event_id, job['dist_index'], job['progress_key'])
+            elif success:
+                successful_sends += 1
+                distribution_manager.update_progress(event_id, job['dist_index'], job['progress_key'])
+                sent_users.setdefault(points, []).append(job['username'])
+                logger.debug("Successfully sent %d OP to %s (%s)", points, job['username'], job['user_id'])
+            elif job.get('outcome_unknown'):
+                unknown_users.setdefault(points, []).append(job['username'])
+            else:
+                if points not in failed_users:
+                    failed_users[points] = []
+                failed_users[points].append(job['username'])
+                logger.warning("Failed to send %d OP to %s (%s)", points, job['username'], job['user_id'])
+
+        # Send points through the worker pool until done, paused or cancelled
+        outcome = "❌ Distribution Stopped"
+        try:
+            finished = await SendEngine(session).run(jobs, on_result, stop_signal)
+            cancelled = pause_manager.is_cancelled(event_id)
+            interrupted = pause_manager.is_interrupted(event_id)
+            if finished:
+                outcome = "✅ Distribution Finished"
+            elif interrupted:
+                outcome = "🔄 Distribution Interrupted"
+            else:
+                outcome = "⏹️ Distribution Cancelled" if cancelled else "⏸️ Distribution Paused"
+        finally:
+            await reporter.finish(outcome)
 
-            # Update event status
-            status_updated = await update_event_status(session, event_id, "Completed")
+        if not finished:
+            # Progress is kept, so the next run continues with the remaining users
+            progress = distribution_manager.get_progress(event_id)
+            if interrupted:
+                next_step = "It continues automatically once the bot has restarted."
+            elif cancelled:
+                next_step = "Run `/sendop` again to continue."
+            elif not pause_manager.is_paused(event_id):
+                next_step = "It was resumed meanwhile and continues now."
+            else:
+                next_step = f"Use `/resume {event_id}` to continue."
+            stopped_embed = discord.Embed(
+                title=outcome,
+                description=f"Event #{event_id} stopped after the sends in flight finished.\n"
+                            f"Completed users: {len(progress['completed_users']) if progress else 0}/{len(plan['jobs'])}\n"
+                            + next_step,
+                color=discord.Color.orange()
+            )
+            await channel.send(embed=stopped_embed)
+            return False, None
+
+        distribution_manager.remove_distribution(event_id)
+
+        # Update event status
+        status_updated = await update_event_status(session, event_id, "Completed")
 
         # Create embed with results in the new style
         embed = discord.Embed(
@@ -761,10 +2794,18 @@ async def process_single_event(interaction: discord.Interaction, event_id: str,
         embed.add_field(name="Event Date", value=event_date, inline=False)
 
         # Add statistics
-        stats_text = f"✅ Successfully sent: {successful_sends}/{total_users}\n"
+        stats_text = f"✅ Successfully sent: {successful_sends + already_sent}/{total_users}\n"
+        if already_sent:
+            stats_text += f"⏭️ Already credited earlier: {already_sent}\n"
         stats_text += f"❌ Failed: {sum(len(users) for users in failed_users.values())}\n"
+        if unknown_users:
+            stats_text += f"❔ Outcome unknown: {sum(len(users) for users in unknown_users.values())}\n"
+        if plan['auto_accepted']:
+            stats_text += f"🤖 Auto-matched names: {len(plan['auto_accepted'])}\n"
         if not_in_server:
-            stats_text += f"⚠️ Not in server: {sum(len(users) for users in not_in_server.values())}"
+            stats_text += f"⚠️ Not in server: {sum(len(users) for users in not_in_server.values())}\n"
+        if plan['duplicates']:
+            stats_text += f"🔁 Duplicates skipped: {plan['duplicates']}"
 
         embed.add_field(
             name="Statistics",
@@ -774,25 +2815,39 @@ async def process_single_event(interaction: discord.Interaction, event_id: str,
 
         # If there are users not in the server, add them to separate field
         if not_in_server:
-            not_in_server_text = []
-            for points, users in not_in_server.items():
-                not_in_server_text.append(f"{points} OP\n```{chr(10).join(users)}```")
-
             embed.add_field(
                 name="Users Not in Server",
-                value="\n".join(not_in_server_text)[:1024],  # Discord limit
+                value=format_name_groups(not_in_server),
                 inline=False
             )
 
         # If there are failed sends, add them to embed
         if failed_users:
-            failed_text = []
-            for points, users in failed_users.items():
-                failed_text.append(f"{points} OP\n```{chr(10).join(users)}```")
-
             embed.add_field(
                 name="Failed Users",
-                value="\n".join(failed_text)[:1024],  # Discord limit
+                value=format_name_groups(failed_users),
+                inline=False
+            )
+
+        # Sends that may have credited the user are never repeated automatically
+        if unknown_users:
+            embed.add_field(
+                name="Outcome Unknown - check in Engage, then use /resolvecredit",
+                value=format_name_groups(unknown_users),
+                inline=False
+            )
+
+        # Closest members for names that did not resolve, so typos can be fixed before a rerun
+        if plan['suggestions']:
+            embed.add_field(
+                name="Did You Mean",
+                value=format_suggestions(plan['suggestions'], NAME_SUGGESTIONS['shown']),
+                inline=False
+            )
+        if plan['auto_accepted']:
+            embed.add_field(
+                name="Auto-matched Names",
+                value=format_auto_accepted(plan['auto_accepted'], NAME_SUGGESTIONS['shown']),
                 inline=False
             )
 
@@ -802,15 +2857,72 @@ async def process_single_event(interaction: discord.Interaction, event_id: str,
         else:
             embed.add_field(name="Status", value="❌ Failed to update event status", inline=False)
 
-        # Send results only once
-        summary_message = await interaction.followup.send(embed=embed)
+        # Send results only once, with the full recipient lists attached
+        with metrics.timer('discord_followup_seconds', action='send'):
+            summary_message = await channel.send(
+                embed=embed,
+                file=build_results_file(event_id, sent_users, failed_users, not_in_server,
+                                        unknown_users=unknown_users, suggestions=plan['suggestions'])
+            )
 
         return True, summary_message
 
     except Exception as e:
         logger.error(f"Error processing event {event_id}: {str(e)}")
-        await interaction.followup.send(f"❌ Error processing event {event_id}: {str(e)}")
+        await channel.send(f"❌ Error processing event {event_id}: {str(e)}")
         return False, None
+    finally:
+        pause_manager.finish_run(event_id)
+
+async def process_events_concurrently(guild: discord.Guild, events, channel):
+    """Runs process_single_event for several events at once.
+
+    events is an async iterator; each event starts as soon as it arrives and
+    a slot is free. Returns (results, error) where error is the exception
+    that stopped the iterator early, if any.
+
+    All events share engage_rate_limiter, whose waiters are served in arrival
+    order; since every event runs the same number of send workers, each active
+    event gets an equal share of the Engage budget however large it is."""
+    semaphore = asyncio.Semaphore(max(1, RATE_LIMIT['max_concurrent_events']))
+
+    async def run(event):
+        async with semaphore:
+            started = time.monotonic()
+            success, summary_message = await process_single_event(guild, channel, str(event['id']))
+            return {
+                'event': event,
+                'success': success,
+                'summary_message': summary_message,
+                'seconds': time.monotonic() - started
+            }
+
+    tasks = []
+    seen = set()
+    error = None
+    try:
+        async for event in events:
+            # An event edited while listing moves to a later page; run it once
+            if event['id'] in seen:
+                continue
+            seen.add(event['id'])
+            tasks.append(asyncio.create_task(run(event)))
+    except Exception as e:
+        logger.error(f"Error fetching events to process: {e}")
+        error = e
+    return await asyncio.gather(*tasks), error
+
+def add_chunked_field(embed: discord.Embed, name: str, lines: list):
+    """Adds lines as one or more fields, each within Discord's 1024 character limit."""
+    chunk = []
+    for line in lines:
+        if chunk and len("\n".join(chunk + [line])) > 1024:
+            embed.add_field(name=name, value="\n".join(chunk), inline=False)
+            name = "⠀"
+            chunk = []
+        chunk.append(line[:1024])
+    if chunk:
+        embed.add_field(name=name, value="\n".join(chunk), inline=False)
 
 @client.tree.command(name="sendallop", description="Send OP for all pending events", guild=discord.Object(id=SAHARA_GUILD_ID))
 async def send_all_op_command(interaction: discord.Interaction):
@@ -819,97 +2931,228 @@ async def send_all_op_command(interaction: discord.Interaction):
         return
 
     try:
-        await interaction.response.send_message("🔍 Fetching pending events...")
-        command_channel = interaction.channel
-
-        # Get list of all events using the same endpoint as in /sendop
-        async with aiohttp.ClientSession() as session:
-            base_url = SAHARA_API_URL.rstrip('/')
-            url = f"{base_url}/api/bot/events"
-            headers = {
-                'Content-Type': 'application/json',
-                'Accept': 'application/json',
-                'x-api-key': os.getenv('ENGAGE_API_TOKEN')
-            }
+        job_id, created = job_queue.enqueue('all_events', None, interaction.channel_id, interaction.user.id)
+        await interaction.response.send_message(format_job_queued(job_id, created, "all pending events"))
+    except Exception as e:
+        logger.error(f"Error in send_all_op_command: {e}")
+        await interaction.response.send_message(f"❌ An error occurred while queuing mass OP distribution: {str(e)}", ephemeral=True)
+
+async def process_all_pending_events(guild: discord.Guild, channel) -> Tuple[bool, str]:
+    """Distributes OP for every pending event, reporting to channel.
+
+    Returns (all events processed, short result for /jobs)."""
+    start_embed = discord.Embed(
+        title="🚀 Starting Mass OP Distribution",
+        description="Pending events are processed as soon as they are fetched.",
+        color=discord.Color.blue()
+    )
+    initial_message = await channel.send(embed=start_embed)
+
+    # Process pending events in parallel while later pages are still loading
+    started = time.monotonic()
+    results, fetch_error = await process_events_concurrently(
+        guild,
+        # Name lists are loaded per event only when it starts
+        iter_bot_events(client.http_session, status='Pending', page_size=500, summary=True),
+        channel
+    )
+    wall_time = time.monotonic() - started
+
+    if pause_manager.shutting_down:
+        await channel.send("🔄 Mass distribution interrupted by a bot restart; it continues automatically once the bot is back.")
+        return False, "Interrupted by shutdown"
+
+    if fetch_error and not results:
+        await channel.send(f"❌ Failed to fetch events: {fetch_error}")
+        return False, f"Failed to fetch events: {fetch_error}"
+
+    if not results:
+        await channel.send("ℹ️ No pending events found.")
+        return True, "No pending events"
+
+    total_processed = 0
+    summary_links = []  # List to store links to messages with results
+    for result in results:
+        event = result['event']
+        if result['success']:
+            total_processed += 1
+            if result['summary_message']:
+                # Create link to message
+                message_link = f"[Event #{event['id']} - {event['title']}](https://discord.com/channels/{guild.id}/{channel.id}/{result['summary_message'].id}) - {event.get('recipientCount', '?')} users in {result['seconds']:.1f}s"
+                summary_links.append(message_link)
+        else:
+            summary_links.append(f"❌ Event #{event['id']} - {event['title']} - {result['seconds']:.1f}s")
+    if fetch_error:
+        summary_links.append(f"⚠️ Stopped fetching events early: {fetch_error}")
+
+    # Output final statistics
+    event_time = sum(result['seconds'] for result in results)
+    final_embed = discord.Embed(
+        title="📊 Mass Distribution Complete",
+        description=f"Successfully processed **{total_processed}/{len(results)}** events\n"
+                    f"Wall time: {wall_time:.1f}s (sum of event times: {event_time:.1f}s)",
+        color=discord.Color.green() if total_processed == len(results) and not fetch_error else discord.Color.orange()
+    )
+    if summary_links:
+        add_chunked_field(final_embed, "Distribution Summaries", summary_links)
+    await initial_message.reply(embed=final_embed)
+    return total_processed == len(results) and not fetch_error, f"{total_processed}/{len(results)} events processed"
+
+JOB_STATUS_EMOJI = {'queued': '🕒', 'running': '⏳', 'done': '✅', 'stopped': '⏸️', 'failed': '❌'}
+
+def format_job_queued(job_id: int, created: bool, target: str) -> str:
+    """Answer to a command that queued a distribution job"""
+    if created:
+        return f"📥 Queued job #{job_id} for {target}. Progress will be posted in this channel; use `/jobs {job_id}` to follow it."
+    return f"ℹ️ {target} is already queued or running as job #{job_id}. Use `/jobs {job_id}` to follow it."
+
+def format_job_line(job: sqlite3.Row) -> str:
+    """One line describing a job for /jobs"""
+    target = f"Event #{job['event_id']}" if job['kind'] == 'event' else "All pending events"
+    line = f"{JOB_STATUS_EMOJI.get(job['status'], '❔')} **#{job['id']}** {target} - {job['status']}, queued <t:{int(job['created_at'])}:R>"
+    if job['finished_at']:
+        line += f", finished <t:{int(job['finished_at'])}:R>"
+    elif job['started_at']:
+        line += f", started <t:{int(job['started_at'])}:R>"
+    if job['detail']:
+        line += f"\n⠀{job['detail']}"
+    return line
+
+async def run_job(job: sqlite3.Row) -> Tuple[str, str]:
+    """Runs one queued job; returns (status, detail) for job_queue.finish.
+
+    Status 'interrupted' means a shutdown stopped the job; it is not finished."""
+    guild = client.get_guild(SAHARA_GUILD_ID)
+    try:
+        channel = client.get_channel(job['channel_id']) or await client.fetch_channel(job['channel_id'])
+    except discord.HTTPException as e:
+        return 'failed', f"Channel {job['channel_id']} is not available: {e}"
+    if guild is None:
+        return 'failed', "Guild is not available"
+
+    if job['kind'] == 'all_events':
+        success, detail = await process_all_pending_events(guild, channel)
+        if not success and pause_manager.shutting_down:
+            return 'interrupted', detail
+        return ('done' if success else 'failed'), detail
+
+    success, _ = await process_single_event(guild, channel, job['event_id'])
+    if success:
+        return 'done', None
+    if pause_manager.is_interrupted(job['event_id']):
+        return 'interrupted', None
+    if distribution_manager.get_progress(job['event_id']) is not None:
+        return 'stopped', "Stopped before finishing; progress is kept"
+    return 'failed', None
+
+@client.tree.command(name="jobs", description="Show queued and recent distribution jobs", guild=discord.Object(id=SAHARA_GUILD_ID))
+@app_commands.describe(job_id="Job ID to show (leave empty for the latest jobs)")
+async def jobs_command(interaction: discord.Interaction, job_id: int = None):
+    """Command to show the status of distribution jobs."""
+    if interaction.guild_id != SAHARA_GUILD_ID:
+        await interaction.response.send_message("This command can only be used in the authorized server.", ephemeral=True)
+        return
 
-            # Add query parameters
-            params = {
-                'draw': '1',
-                'start': '0',
-                'length': '100',
-                'search[value]': '',
-                'order[0][column]': '0',
-                'order[0][dir]': 'desc'
-            }
+    if interaction.user.id not in AUTHORIZED_USERS:
+        await interaction.response.send_message("You are not authorized to use this command.", ephemeral=True)
+        return
 
-            async with session.get(url, headers=headers, params=params, allow_redirects=False) as response:
-                # If server redirects request, it means endpoint is incorrect
-                if response.status in (301, 302, 303, 307, 308):
-                    redirect_url = response.headers.get('Location', 'unknown')
-                    logger.error(f"Redirection detected. Endpoint returned redirect to {redirect_url}")
-                    await interaction.followup.send("❌ Failed to fetch events: received a redirect response, endpoint may be incorrect.")
-                    return
+    try:
+        if job_id is not None:
+            job = job_queue.get(job_id)
+            if not job:
+                await interaction.response.send_message(f"❌ Job #{job_id} not found.", ephemeral=True)
+                return
+            jobs = [job]
+        else:
+            jobs = job_queue.recent(JOB_QUEUE['list_size'])
 
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(f"Failed to fetch events. Status: {response.status}, Error: {error_text}")
-                    await interaction.followup.send("❌ Failed to fetch events from the server.")
-                    return
+        embed = discord.Embed(title="📋 Distribution Jobs", color=discord.Color.blue())
+        if jobs:
+            add_chunked_field(embed, "Jobs", [format_job_line(job) for job in jobs])
+        else:
+            embed.description = "No jobs yet."
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    except Exception as e:
+        logger.error(f"Error in jobs command: {e}")
+        await interaction.response.send_message(f"❌ An error occurred: {str(e)}", ephemeral=True)
 
-                events_data = await response.json()
-                if not events_data.get('data'):
-                    await interaction.followup.send("❌ No events found.")
-                    return
+@client.tree.command(name="unknowncredits", description="List sends whose outcome is unknown", guild=discord.Object(id=SAHARA_GUILD_ID))
+@app_commands.describe(event_id="Only list sends of this event")
+async def unknown_credits_command(interaction: discord.Interaction, event_id: str = None):
+    """Lists sends that may have reached Engage without an answer; they are never repeated automatically."""
+    if interaction.guild_id != SAHARA_GUILD_ID:
+        await interaction.response.send_message("This command can only be used in the authorized server.", ephemeral=True)
+        return
 
-                # Filter events with status Pending
-                pending_events = [event for event in events_data['data'] if event.get('status') == 'Pending']
+    if interaction.user.id not in AUTHORIZED_USERS:
+        await interaction.response.send_message("You are not authorized to use this command.", ephemeral=True)
+        return
 
-        if not pending_events:
-            await interaction.followup.send("ℹ️ No pending events found.")
+    try:
+        credits = send_ledger.unknown_credits(event_id)
+        embed = discord.Embed(title="❔ Sends With Unknown Outcome", color=discord.Color.orange())
+        if credits:
+            embed.description = "Check these users in Engage, then settle each with `/resolvecredit`."
+            add_chunked_field(embed, "Sends", [
+                f"Event #{credit_event_id}: <@{user_id}> - {points} OP" for credit_event_id, _, user_id, points in credits
+            ])
+        else:
+            embed.description = "None - every send has a known outcome."
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    except Exception as e:
+        logger.error(f"Error in unknowncredits command: {e}")
+        await interaction.response.send_message(f"❌ An error occurred: {str(e)}", ephemeral=True)
+
+@client.tree.command(name="resolvecredit", description="Settle a send whose outcome is unknown", guild=discord.Object(id=SAHARA_GUILD_ID))
+@app_commands.describe(
+    event_id="Event ID of the send",
+    user="User the OP was sent to",
+    credited="Whether Engage shows the user was credited; if not, the OP is sent now"
+)
+async def resolve_credit_command(interaction: discord.Interaction, event_id: str, user: discord.User, credited: bool):
+    """Records the outcome an operator checked in Engage, sending the OP again if it never arrived."""
+    if interaction.guild_id != SAHARA_GUILD_ID:
+        await interaction.response.send_message("This command can only be used in the authorized server.", ephemeral=True)
+        return
+
+    if interaction.user.id not in AUTHORIZED_USERS:
+        await interaction.response.send_message("You are not authorized to use this command.", ephemeral=True)
+        return
+
+    try:
+        if credited:
+            count = send_ledger.resolve_unknown(event_id, str(user.id))
+            if count:
+                await interaction.response.send_message(f"✅ Recorded {count} send(s) to {user.mention} for Event #{event_id} as credited.")
+            else:
+                await interaction.response.send_message(f"ℹ️ No send with an unknown outcome for {user.mention} in Event #{event_id}.", ephemeral=True)
             return
 
-        # Output information about found events
-        start_embed = discord.Embed(
-            title="🚀 Starting Mass OP Distribution",
-            description=f"Found **{len(pending_events)}** pending events to process\n\n" +
-                        "Events to process:\n" +
-                        "\n".join([f"• Event #{event['id']} - {event['title']}" for event in pending_events]),
-            color=discord.Color.blue()
-        )
-        initial_message = await command_channel.send(embed=start_embed)
+        await interaction.response.defer()
+        claimed = send_ledger.reclaim_unknown(event_id, str(user.id))
+        if not claimed:
+            await interaction.followup.send(f"ℹ️ No send with an unknown outcome for {user.mention} in Event #{event_id}.")
+            return
 
-        # Process each event
-        total_processed = 0
-        summary_links = []  # List to store links to messages with results
-        for index, event in enumerate(pending_events, 1):
-            success, summary_message = await process_single_event(interaction, str(event['id']), command_channel)
+        lines = []
+        for distribution, points in claimed:
+            success, _ = await send_op_to_user(client.http_session, str(user.id), points, reason=f"Event #{event_id}", event_id=int(event_id))
             if success:
-                total_processed += 1
-                if summary_message:
-                    # Create link to message
-                    message_link = f"[Event #{event['id']} Summary](https://discord.com/channels/{interaction.guild_id}/{command_channel.id}/{summary_message.id})"
-                    summary_links.append(message_link)
-
-            # Wait between processing
-            await asyncio.sleep(1)
-
-        # Output final statistics
-        final_embed = discord.Embed(
-            title="📊 Mass Distribution Complete",
-            description=f"Successfully processed **{total_processed}/{len(pending_events)}** events",
-            color=discord.Color.green() if total_processed == len(pending_events) else discord.Color.orange()
-        )
-        if summary_links:
-            final_embed.add_field(
-                name="Distribution Summaries",
-                value="\n".join(summary_links),
-                inline=False
-            )
-        await initial_message.reply(embed=final_embed)
-
+                send_ledger.confirm(event_id, distribution, str(user.id))
+                lines.append(f"✅ Sent {points} OP to {user.mention}")
+            else:
+                # Kept in the list until it is settled
+                send_ledger.mark_unknown(event_id, distribution, str(user.id))
+                outcome = "outcome unknown again" if success is None else "failed"
+                lines.append(f"❌ Sending {points} OP to {user.mention} {outcome}; check again later")
+        await interaction.followup.send("\n".join(lines))
     except Exception as e:
-        logger.error(f"Error in send_all_op_command: {e}")
-        await interaction.followup.send(f"❌ An error occurred while processing mass OP distribution: {str(e)}", ephemeral=True)
+        logger.error(f"Error in resolvecredit command: {e}")
+        if interaction.response.is_done():
+            await interaction.followup.send(f"❌ An error occurred: {str(e)}")
+        else:
+            await interaction.response.send_message(f"❌ An error occurred: {str(e)}", ephemeral=True)
 
 @client.tree.command(name="history", description="Show OP history for a user", guild=discord.Object(id=SAHARA_GUILD_ID))
 @app_commands.describe(user="User to check history for")
@@ -918,106 +3161,157 @@ async def history_command(interaction: discord.Interaction, user: discord.Member
     try:
         await interaction.response.defer(ephemeral=True)
         
-        async with aiohttp.ClientSession() as session:
-            # Use correct endpoint and headers
-            base_url = SAHARA_API_URL.rstrip('/')
-            url = f"{base_url}/api/bot/events"
-            headers = {
-                'Content-Type': 'application/json',
-                'x-api-key': ENGAGE_API_TOKEN,
-                'Accept': 'application/json'
-            }
-            
-            async with session.get(url, headers=headers) as response:
-                if response.status == 401:
-                    await interaction.followup.send("❌ Unauthorized access. Please check API configuration.", ephemeral=True)
-                    return
-                    
-                if not response.ok:
-                    await interaction.followup.send(f"❌ Failed to fetch events: {response.status}", ephemeral=True)
-                    return
-                
-                data = await response.json()
-                if not data or 'data' not in data:
-                    await interaction.followup.send("❌ No events data found", ephemeral=True)
-                    return
+        # Serve from the local index, fetching only events changed since the last query
+        refreshed = await history_index.refresh(client.http_session)
+        if not refreshed and history_index.cursor is None:
+            await interaction.followup.send("❌ Failed to fetch events", ephemeral=True)
+            return
 
-                events = data['data']
-                
-                # Filter completed events
-                completed_events = [event for event in events if event['status'] == 'Completed']
-                
-                # Search for user in distribution lists
-                user_events = []
-                total_op = 0
-                
-                for event in completed_events:
-                    for dist in event['distributions']:
-                        names = [name.strip() for name in dist['nameList'].split('\n')]
-                        # Check all user name variants
-                        user_name = user.name.strip()
-                        user_global_name = user.global_name.strip() if user.global_name else None
-                        user_mention = user.mention.strip()
-                        user_display_name = user.display_name.strip()
-                        
-                        # Create list of all possible user names
-                        possible_names = [name for name in [user_name, user_global_name, user_mention, user_display_name] if name]
-                        
-                        # Check if any of the user names are in the list
-                        if any(name in names for name in possible_names):
-                            op_amount = dist['xpAmount']
-                            total_op += op_amount
-                            user_events.append({
-                                'title': event['title'],
-                                'op': op_amount
-                            })
-
-                if not user_events:
-                    await interaction.followup.send(f"❌ No OP history found for {user.mention}", ephemeral=True)
-                    return
+        user_events = history_index.lookup(user)
+        total_op = sum(event['op'] for event in user_events)
 
-                # Create embed with history
-                embed = discord.Embed(
-                    title=f"📊 OP History for {user.display_name}",
-                    color=discord.Color.blue()
-                )
-                
-                # Add user avatar
-                avatar_url = user.display_avatar.url if user.display_avatar else user.default_avatar.url
-                embed.set_thumbnail(url=avatar_url)
-                
-                embed.add_field(
-                    name="Total OP Earned",
-                    value=f"`{total_op} OP`",
-                    inline=False
-                )
+        if not user_events:
+            await interaction.followup.send(f"❌ No OP history found for {user.mention}", ephemeral=True)
+            return
 
-                # Add small space
-                embed.add_field(
-                    name="⠀",
-                    value="⠀",
-                    inline=False
-                )
-                
-                # Add recent events (maximum 10)
-                recent_events = sorted(user_events, key=lambda x: x['op'], reverse=True)[:10]
-                recent_events_text = "\n".join([
-                    f"✅ **{event['title']}** ➜ `{event['op']} OP`"
-                    for event in recent_events
-                ])
-                
-                embed.add_field(
-                    name="🎮 Recent Events",
-                    value=recent_events_text or "No recent events",
-                    inline=False
-                )
+        # Create embed with history
+        embed = discord.Embed(
+            title=f"📊 OP History for {user.display_name}",
+            color=discord.Color.blue()
+        )
+            
+        # Add user avatar
+        avatar_url = user.display_avatar.url if user.display_avatar else user.default_avatar.url
+        embed.set_thumbnail(url=avatar_url)
+            
+        embed.add_field(
+            name="Total OP Earned",
+            value=f"`{total_op} OP`",
+            inline=False
+        )
+
+        # Add small space
+        embed.add_field(
+            name="⠀",
+            value="⠀",
+            inline=False
+        )
+            
+        # Add recent events (maximum 10)
+        recent_events = sorted(user_events, key=lambda x: x['op'], reverse=True)[:10]
+        recent_events_text = "\n".join([
+            f"✅ **{event['title']}** ➜ `{event['op']} OP`"
+            for event in recent_events
+        ])
+            
+        embed.add_field(
+            name="🎮 Recent Events",
+            value=recent_events_text or "No recent events",
+            inline=False
+        )
 
-                await interaction.followup.send(embed=embed, ephemeral=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
 
     except Exception as e:
         logger.error(f"Error in history command: {str(e)}")
         await interaction.followup.send(f"❌ An error occurred: {str(e)}", ephemeral=True)
 
+class WhitelistCache:
+    """Keeps the whitelisted user IDs for WHITELIST_CACHE['ttl'] seconds.
+
+    Whitelist commands invalidate it after changing the list; concurrent
+    callers share one fetch."""
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.user_ids: list = None
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self, session: aiohttp.ClientSession, url: str, headers: dict) -> list:
+        """Returns the whitelisted IDs, fetching them when the copy is missing or stale"""
+        async with self._lock:
+            if self.user_ids is None or time.monotonic() - self._fetched_at >= self.ttl:
+                async with session.get(url, headers=headers) as response:
+                    if response.status != 200:
+                        raise RuntimeError(f"Error fetching whitelist. Status: {response.status}")
+                    data = await response.json()
+                self.user_ids = data.get('users') or []
+                self._fetched_at = time.monotonic()
+            return self.user_ids
+
+    def invalidate(self):
+        self.user_ids = None
+
+class WhitelistPages(discord.ui.View):
+    """Pages through whitelisted users with buttons; only the visible page is rendered"""
+    def __init__(self, guild: discord.Guild, user_ids: list, owner_id: int):
+        super().__init__(timeout=WHITELIST_CACHE['view_timeout'])
+        self.guild = guild
+        self.user_ids = user_ids
+        self.owner_id = owner_id
+        self.page = 0
+        self.page_count = max(1, -(-len(user_ids) // WHITELIST_CACHE['page_size']))
+        self.message = None
+        self._update_buttons()
+
+    def render(self) -> discord.Embed:
+        size = WHITELIST_CACHE['page_size']
+        start = self.page * size
+        user_list = []
+        for user_id in self.user_ids[start:start + size]:
+            member = self.guild.get_member(int(user_id))
+            if member:
+                user_list.append(f"{member.mention} ({member.name})")
+            else:
+                user_list.append(f"ID: {user_id} (not in server)")
+
+        embed = discord.Embed(
+            title="Whitelist Users",
+            description=f"Total users: {len(self.user_ids)}\n\n" + "\n".join(user_list),
+            color=discord.Color.blue()
+        )
+        embed.set_footer(text=f"Page {self.page + 1}/{self.page_count}")
+        return embed
+
+    def _update_buttons(self):
+        self.first.disabled = self.previous.disabled = self.page == 0
+        self.next.disabled = self.last.disabled = self.page >= self.page_count - 1
+
+    async def _show(self, interaction: discord.Interaction, page: int):
+        self.page = min(max(page, 0), self.page_count - 1)
+        self._update_buttons()
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.owner_id
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
+    @discord.ui.button(label="⏮", style=discord.ButtonStyle.secondary)
+    async def first(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, 0)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page - 1)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page + 1)
+
+    @discord.ui.button(label="⏭", style=discord.ButtonStyle.secondary)
+    async def last(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page_count - 1)
+
+whitelist_cache = WhitelistCache(WHITELIST_CACHE['ttl'])
+
 class WhitelistCommands(app_commands.Group):
     def __init__(self):
         super().__init__(name="whitelist", description="Whitelist management commands")
@@ -1055,17 +3349,18 @@ class WhitelistCommands(app_commands.Group):
             url = f"{self.get_base_url()}/whitelist/{user.id}/{os.getenv('WHITELIST_SECRET')}"
             headers = self.get_headers()
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if data.get('success'):
-                            action = "added to" if data.get('created') else "already in"
-                            await interaction.followup.send(f"✅ User {user.mention} {action} whitelist")
-                        else:
-                            await interaction.followup.send(f"❌ Failed to add user to whitelist: {data.get('error')}")
+            session = interaction.client.http_session
+            async with session.get(url, headers=headers) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    if data.get('success'):
+                        whitelist_cache.invalidate()
+                        action = "added to" if data.get('created') else "already in"
+                        await interaction.followup.send(f"✅ User {user.mention} {action} whitelist")
                     else:
-                        await interaction.followup.send(f"❌ Error adding user to whitelist. Status: {response.status}")
+                        await interaction.followup.send(f"❌ Failed to add user to whitelist: {data.get('error')}")
+                else:
+                    await interaction.followup.send(f"❌ Error adding user to whitelist. Status: {response.status}")
         except Exception as e:
             logger.error(f"Error in whitelist add: {str(e)}")
             await interaction.followup.send(f"❌ Error: {str(e)}")
@@ -1081,20 +3376,137 @@ class WhitelistCommands(app_commands.Group):
             url = f"{self.get_base_url()}/whitelist/{user.id}/{os.getenv('WHITELIST_SECRET')}"
             headers = self.get_headers()
 
-            async with aiohttp.ClientSession() as session:
-                async with session.delete(url, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if data.get('success'):
-                            await interaction.followup.send(f"✅ User {user.mention} removed from whitelist")
-                        else:
-                            await interaction.followup.send(f"❌ Failed to remove user from whitelist: {data.get('error')}")
+            session = interaction.client.http_session
+            async with session.delete(url, headers=headers) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    if data.get('success'):
+                        whitelist_cache.invalidate()
+                        await interaction.followup.send(f"✅ User {user.mention} removed from whitelist")
                     else:
-                        await interaction.followup.send(f"❌ Error removing user from whitelist. Status: {response.status}")
+                        await interaction.followup.send(f"❌ Failed to remove user from whitelist: {data.get('error')}")
+                else:
+                    await interaction.followup.send(f"❌ Error removing user from whitelist. Status: {response.status}")
         except Exception as e:
             logger.error(f"Error in whitelist remove: {str(e)}")
             await interaction.followup.send(f"❌ Error: {str(e)}")
 
+    # Raw IDs and the IDs inside <@mentions>
+    USER_ID_PATTERN = re.compile(r'\b\d{17,20}\b')
+
+    async def collect_user_ids(self, role: discord.Role, users: str, file: discord.Attachment) -> list:
+        """Returns the distinct IDs of a role's members, mentions or IDs in text, and IDs in a file"""
+        user_ids = []
+        if role:
+            user_ids.extend(str(member.id) for member in role.members)
+        if users:
+            user_ids.extend(self.USER_ID_PATTERN.findall(users))
+        if file:
+            if file.size > WHITELIST_BATCH['max_file_bytes']:
+                raise ValueError(f"{file.filename} is larger than {WHITELIST_BATCH['max_file_bytes'] // 1024} KB")
+            user_ids.extend(self.USER_ID_PATTERN.findall((await file.read()).decode('utf-8', errors='ignore')))
+        return list(dict.fromkeys(user_ids))
+
+    async def update_in_batches(self, session: aiohttp.ClientSession, action: str, user_ids: list, added_by: str) -> Dict[str, list]:
+        """Adds or removes users through /whitelist-batch, several batches at once.
+
+        Returns the server's ID lists merged across batches ('added' and
+        'existing', or 'removed' and 'missing') plus 'failed' for IDs whose
+        batch request failed."""
+        url = f"{self.get_base_url()}/whitelist-batch/{urllib.parse.quote(os.getenv('WHITELIST_SECRET') or '', safe='')}"
+        semaphore = asyncio.Semaphore(WHITELIST_BATCH['concurrency'])
+        results = {'failed': []}
+
+        async def send_batch(batch: list):
+            async with semaphore:
+                try:
+                    async with session.post(url, headers=self.get_headers(),
+                                            json={'action': action, 'userIds': batch, 'addedBy': added_by}) as response:
+                        if response.status != 200:
+                            error_text = await response.text()
+                            logger.error(f"Whitelist batch {action} failed. Status: {response.status}, Response: {error_text}")
+                            results['failed'].extend(batch)
+                            return
+                        data = await response.json()
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.error(f"Whitelist batch {action} failed: {str(e) or type(e).__name__}")
+                    results['failed'].extend(batch)
+                    return
+            for key, ids in data.items():
+                if isinstance(ids, list):
+                    results.setdefault(key, []).extend(ids)
+
+        size = WHITELIST_BATCH['batch_size']
+        await asyncio.gather(*(send_batch(user_ids[i:i + size]) for i in range(0, len(user_ids), size)))
+        return results
+
+    async def run_bulk(self, interaction: discord.Interaction, action: str, role: discord.Role, users: str,
+                       file: discord.Attachment):
+        """Shared body of bulk-add and bulk-remove"""
+        if not await self.check_authorized(interaction):
+            return
+
+        try:
+            await interaction.response.defer(ephemeral=True)
+
+            try:
+                user_ids = await self.collect_user_ids(role, users, file)
+            except ValueError as e:
+                await interaction.followup.send(f"❌ {e}")
+                return
+            if not user_ids:
+                await interaction.followup.send("❌ No user IDs found. Give a role, mentions or IDs, or a file of IDs.")
+                return
+
+            results = await self.update_in_batches(interaction.client.http_session, action, user_ids, str(interaction.user))
+            whitelist_cache.invalidate()
+
+            if action == 'add':
+                groups = (("✅ Added", results.get('added', [])), ("ℹ️ Already in whitelist", results.get('existing', [])))
+            else:
+                groups = (("✅ Removed", results.get('removed', [])), ("ℹ️ Not in whitelist", results.get('missing', [])))
+            groups += (("❌ Failed", results['failed']),)
+
+            embed = discord.Embed(
+                title=f"📝 Whitelist Bulk {'Add' if action == 'add' else 'Remove'}",
+                description=f"Processed {len(user_ids)} users",
+                color=discord.Color.orange() if results['failed'] else discord.Color.green()
+            )
+            for name, ids in groups:
+                embed.add_field(name=name, value=str(len(ids)), inline=True)
+
+            lines = []
+            for name, ids in groups:
+                if ids:
+                    lines.append(f"# {name} ({len(ids)})")
+                    lines.extend(ids)
+                    lines.append("")
+            results_file = discord.File(io.BytesIO("\n".join(lines).encode('utf-8')), filename=f"whitelist_{action}_results.txt")
+            await interaction.followup.send(embed=embed, file=results_file)
+        except Exception as e:
+            logger.error(f"Error in whitelist bulk {action}: {str(e)}")
+            await interaction.followup.send(f"❌ Error: {str(e)}")
+
+    @app_commands.command(name="bulk-add", description="Add many users to the whitelist")
+    @app_commands.describe(
+        role="Add every member with this role",
+        users="Mentions or user IDs separated by spaces, commas or new lines",
+        file="Text file with user IDs"
+    )
+    async def bulk_add(self, interaction: discord.Interaction, role: discord.Role = None, users: str = None,
+                       file: discord.Attachment = None):
+        await self.run_bulk(interaction, 'add', role, users, file)
+
+    @app_commands.command(name="bulk-remove", description="Remove many users from the whitelist")
+    @app_commands.describe(
+        role="Remove every member with this role",
+        users="Mentions or user IDs separated by spaces, commas or new lines",
+        file="Text file with user IDs"
+    )
+    async def bulk_remove(self, interaction: discord.Interaction, role: discord.Role = None, users: str = None,
+                          file: discord.Attachment = None):
+        await self.run_bulk(interaction, 'remove', role, users, file)
+
     @app_commands.command(name="list", description="Show list of users in the whitelist")
     async def list(self, interaction: discord.Interaction):
         if not await self.check_authorized(interaction):
@@ -1104,43 +3516,17 @@ class WhitelistCommands(app_commands.Group):
             await interaction.response.defer(ephemeral=True)
 
             url = f"{self.get_base_url()}/whitelist-list/{os.getenv('WHITELIST_SECRET')}"
-            headers = self.get_headers()
-
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if data.get('users'):
-                            # Create list of users with their mentions
-                            user_list = []
-                            for user_id in data['users']:
-                                member = interaction.guild.get_member(int(user_id))
-                                if member:
-                                    user_list.append(f"{member.mention} ({member.name})")
-                                else:
-                                    user_list.append(f"ID: {user_id} (not in server)")
-
-                            # Create embed for nice display
-                            embed = discord.Embed(
-                                title="Whitelist Users",
-                                description=f"Total users: {len(data['users'])}",
-                                color=discord.Color.blue()
-                            )
-
-                            # Split list into chunks if it's too long
-                            chunks = [user_list[i:i + 10] for i in range(0, len(user_list), 10)]
-                            for i, chunk in enumerate(chunks, 1):
-                                embed.add_field(
-                                    name=f"Users",
-                                    value="\n".join(chunk) or "No users",
-                                    inline=False
-                                )
-
-                            await interaction.followup.send(embed=embed)
-                        else:
-                            await interaction.followup.send("No users in whitelist")
-                    else:
-                        await interaction.followup.send(f"❌ Error fetching whitelist. Status: {response.status}")
+            user_ids = await whitelist_cache.get(interaction.client.http_session, url, self.get_headers())
+            if not user_ids:
+                await interaction.followup.send("No users in whitelist")
+                return
+
+            view = WhitelistPages(interaction.guild, user_ids, interaction.user.id)
+            if view.page_count == 1:
+                view.stop()
+                await interaction.followup.send(embed=view.render())
+            else:
+                view.message = await interaction.followup.send(embed=view.render(), view=view)
         except Exception as e:
             logger.error(f"Error in whitelist list: {str(e)}")
             await interaction.followup.send(f"❌ Error: {str(e)}")
@@ -1159,4 +3545,5 @@ class WhitelistCommands(app_commands.Group):
             )
 
 if __name__ == "__main__":
-    client.run(DISCORD_TOKEN)
+    # Logging is already set up; stop discord.py from adding its own handler
+    client.run(DISCORD_TOKEN, log_handler=None)
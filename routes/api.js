@@ -1,5 +1,8 @@
 const express = require('express');
+const axios = require('axios');
+const crypto = require('crypto');
 const router = express.Router();
+const { Op, literal, where } = require('sequelize');
 const { Event, Distribution, Log } = require('../models');
 const Logger = require('../utils/logger');
 
@@ -19,10 +22,38 @@ const checkApiKey = (req, res, next) => {
     next();
 };
 
+// Changes whenever the event or any of its distributions is edited, added or removed
+const EVENT_VERSION = literal(
+    `(SELECT COUNT(*) || ':' || COALESCE(SUM(d."id"), 0) || ':' || COALESCE(EXTRACT(EPOCH FROM MAX(d."updatedAt")), 0) FROM "Distributions" AS d WHERE d."eventId" = "Event"."id")`
+);
+
+const eventEtag = (event) => {
+    const version = `${event.id}:${event.updatedAt.toISOString()}:${event.get('version')}`;
+    return `"${crypto.createHash('sha1').update(version).digest('base64url')}"`;
+};
+
 // Bot routes (no auth required, only API key)
+// Responses carry an ETag; a matching If-None-Match gets a 304 without loading the name lists
 router.get('/events/:id', checkApiKey, async (req, res) => {
     try {
         console.log(`Fetching event ${req.params.id} for bot`);
+        const versioned = await Event.findByPk(req.params.id, {
+            attributes: ['id', 'updatedAt', [EVENT_VERSION, 'version']]
+        });
+
+        if (!versioned) {
+            console.log(`Event ${req.params.id} not found`);
+            return res.status(404).json({ error: 'Event not found' });
+        }
+
+        const etag = eventEtag(versioned);
+        res.set('ETag', etag);
+        res.set('Cache-Control', 'no-cache');
+        const ifNoneMatch = (req.headers['if-none-match'] || '').split(',').map(tag => tag.trim());
+        if (ifNoneMatch.includes(etag)) {
+            return res.status(304).end();
+        }
+
         const event = await Event.findByPk(req.params.id, {
             include: [{
                 model: Distribution,
@@ -118,21 +149,232 @@ router.post('/log', checkApiKey, async (req, res) => {
     }
 });
 
+const MAX_LOGS_PAGE_SIZE = 100;
+const MAX_LOGS_WAIT_SECONDS = 30;
+
+// Recent site activity for the bot's log relay, oldest first
+// ?after=<seq> returns entries after that seq, up to ?limit= per page
+// ?wait=<seconds> holds the request open until an entry arrives (long polling)
+// ?bootId= is the bootId of the last response; a different one means the
+// server restarted and entries are returned from the start of the new buffer
+router.get('/logs', checkApiKey, async (req, res) => {
+    try {
+        let after = Math.max(0, parseInt(req.query.after, 10) || 0);
+        if (req.query.bootId && req.query.bootId !== Logger.bootId) {
+            after = 0;
+        }
+        const limit = Math.min(Math.max(parseInt(req.query.limit, 10) || MAX_LOGS_PAGE_SIZE, 1), MAX_LOGS_PAGE_SIZE);
+        const wait = Math.min(Math.max(parseFloat(req.query.wait) || 0, 0), MAX_LOGS_WAIT_SECONDS);
+
+        if (wait > 0) {
+            await Logger.waitForLogs(after, wait * 1000);
+        }
+
+        res.json({ bootId: Logger.bootId, ...Logger.getLogs(after, limit) });
+    } catch (error) {
+        console.error('Error fetching logs for bot:', error);
+        res.status(500).json({ error: error.message });
+    }
+});
+
+const MAX_EVENTS_PAGE_SIZE = 500;
+
+// The later of the event's and its distributions' updatedAt, so editing only a
+// distribution still counts as a change to its event
+const EVENT_CHANGED_AT = literal(
+    `GREATEST("Event"."updatedAt", COALESCE((SELECT MAX(d."updatedAt") FROM "Distributions" AS d WHERE d."eventId" = "Event"."id"), "Event"."updatedAt"))`
+);
+
+// Cursors are opaque to the bot: the (changedAt, id) of the last event of a page
+const encodeEventsCursor = (event) => Buffer.from(JSON.stringify({
+    changedAt: new Date(event.get('changedAt')).toISOString(),
+    id: event.id
+})).toString('base64url');
+
+const decodeEventsCursor = (cursor) => {
+    const { changedAt, id } = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf8'));
+    const date = new Date(changedAt);
+    if (isNaN(date.getTime()) || !Number.isInteger(id)) {
+        throw new Error('Malformed cursor');
+    }
+    return { changedAt: date, id };
+};
+
+// Non-blank lines of a distribution's name list, counted by the database
+const RECIPIENT_COUNT = literal(
+    `(SELECT COUNT(*) FROM regexp_split_to_table("distributions"."nameList", E'\\n') AS name WHERE btrim(name, E' \\t\\r') <> '')`
+);
+
+// Summary view: event fields and recipient counts without the name lists
+const toEventSummary = (event) => {
+    const recipientCounts = event.distributions.map(dist => Number(dist.get('recipientCount')));
+    return {
+        id: event.id,
+        title: event.title,
+        status: event.status,
+        eventDate: event.eventDate,
+        updatedAt: event.updatedAt,
+        changedAt: event.get('changedAt'),
+        distributionCount: recipientCounts.length,
+        recipientCount: recipientCounts.reduce((total, count) => total + count, 0)
+    };
+};
+
 // List all events for bot commands
+// Optional filters: ?status=Completed and ?updatedAfter=<ISO date> (inclusive),
+// which matches events whose changedAt (see EVENT_CHANGED_AT) is at or after it
+// Pagination: ?limit=<n> returns one page and a nextCursor to pass as ?cursor=
+// ?view=summary returns toEventSummary() objects instead of full events
+// serverTime is taken before the query; as the next updatedAfter it misses no change
 router.get('/events', checkApiKey, async (req, res) => {
     try {
+        const serverTime = new Date().toISOString();
+        const conditions = [];
+        if (req.query.status) {
+            conditions.push({ status: req.query.status });
+        }
+        if (req.query.updatedAfter) {
+            const updatedAfter = new Date(req.query.updatedAfter);
+            if (isNaN(updatedAfter.getTime())) {
+                return res.status(400).json({ error: 'Invalid updatedAfter date' });
+            }
+            conditions.push(where(EVENT_CHANGED_AT, { [Op.gte]: updatedAfter }));
+        }
+        if (req.query.cursor) {
+            let cursor;
+            try {
+                cursor = decodeEventsCursor(req.query.cursor);
+            } catch (error) {
+                return res.status(400).json({ error: 'Invalid cursor' });
+            }
+            conditions.push({
+                [Op.or]: [
+                    where(EVENT_CHANGED_AT, { [Op.gt]: cursor.changedAt }),
+                    { [Op.and]: [where(EVENT_CHANGED_AT, cursor.changedAt), { id: { [Op.gt]: cursor.id } }] }
+                ]
+            });
+        }
+
+        let limit = null;
+        if (req.query.limit) {
+            limit = parseInt(req.query.limit, 10);
+            if (!(limit > 0)) {
+                return res.status(400).json({ error: 'Invalid limit' });
+            }
+            limit = Math.min(limit, MAX_EVENTS_PAGE_SIZE);
+        }
+
+        const summary = req.query.view === 'summary';
         const events = await Event.findAll({
+            where: { [Op.and]: conditions },
+            attributes: summary
+                ? ['id', 'title', 'status', 'eventDate', 'updatedAt', [EVENT_CHANGED_AT, 'changedAt']]
+                : { include: [[EVENT_CHANGED_AT, 'changedAt']] },
             include: [{
                 model: Distribution,
-                as: 'distributions'
-            }]
+                as: 'distributions',
+                ...(summary ? { attributes: ['id', [RECIPIENT_COUNT, 'recipientCount']] } : {})
+            }],
+            order: [[EVENT_CHANGED_AT, 'ASC'], ['id', 'ASC']],
+            // One extra row tells whether another page follows
+            ...(limit ? { limit: limit + 1 } : {})
+        });
+
+        const format = (rows) => (summary ? rows.map(toEventSummary) : rows);
+        if (!limit) {
+            // Respond with events in a 'data' field
+            return res.json({ data: format(events), serverTime });
+        }
+
+        const page = events.slice(0, limit);
+        res.json({
+            data: format(page),
+            nextCursor: events.length > limit ? encodeEventsCursor(page[page.length - 1]) : null,
+            serverTime
         });
-        // Respond with events in a 'data' field
-        res.json({ data: events });
     } catch (error) {
         console.error('Error fetching events for bot:', error);
         res.status(500).json({ error: error.message });
     }
 });
 
+// Batching proxy for the Engage credit API: credits many users with the same
+// points in one bot request and reports the outcome per user. Engage is called
+// once per user, no faster than the requestsPerSecond the bot passes along;
+// after a 429 the remaining users are skipped and reported with status 429.
+// status 0 means the call failed without an answer, so its outcome is unknown.
+const BULK_CREDIT_MAX_USERS = 500;
+const BULK_CREDIT_CONCURRENCY = 10;
+
+router.post('/engage/bulk', checkApiKey, async (req, res) => {
+    const { points, userIds, requestsPerSecond } = req.body;
+
+    if (!Number.isInteger(points) || points <= 0) {
+        return res.status(400).json({ error: 'points must be a positive integer' });
+    }
+    if (!Array.isArray(userIds) || userIds.length === 0 || userIds.length > BULK_CREDIT_MAX_USERS) {
+        return res.status(400).json({ error: `userIds must be a list of 1 to ${BULK_CREDIT_MAX_USERS} ids` });
+    }
+    if (requestsPerSecond !== undefined && !(typeof requestsPerSecond === 'number' && requestsPerSecond > 0)) {
+        return res.status(400).json({ error: 'requestsPerSecond must be a positive number' });
+    }
+
+    try {
+        const results = new Array(userIds.length);
+        const interval = requestsPerSecond ? 1000 / requestsPerSecond : 0;
+        let next = 0;
+        let nextStart = Date.now();
+        let rateLimited = false;
+
+        // Spaces the starts of Engage calls across all workers
+        const pace = async () => {
+            if (!interval) return;
+            const now = Date.now();
+            const startAt = Math.max(now, nextStart);
+            nextStart = startAt + interval;
+            if (startAt > now) {
+                await new Promise(resolve => setTimeout(resolve, startAt - now));
+            }
+        };
+
+        const worker = async () => {
+            while (next < userIds.length) {
+                const index = next++;
+                const userId = String(userIds[index]);
+                if (!rateLimited) {
+                    await pace();
+                }
+                if (rateLimited) {
+                    results[index] = { userId, success: false, status: 429, skipped: true };
+                    continue;
+                }
+                try {
+                    const response = await axios.get(process.env.ENGAGE_API_URL, {
+                        params: { userId, points },
+                        headers: { 'x-api-key': process.env.ENGAGE_API_TOKEN },
+                        timeout: 30000,
+                        validateStatus: () => true
+                    });
+                    results[index] = { userId, success: response.status === 200, status: response.status };
+                    if (response.status === 429) {
+                        rateLimited = true;
+                        results[index].retryAfter = response.headers['retry-after'] || null;
+                    }
+                } catch (error) {
+                    results[index] = { userId, success: false, status: 0, error: error.message };
+                }
+            }
+        };
+
+        await Promise.all(Array.from({ length: Math.min(BULK_CREDIT_CONCURRENCY, userIds.length) }, worker));
+
+        const credited = results.filter(result => result.success).length;
+        console.log(`Bulk credit: ${credited}/${userIds.length} users received ${points} points`);
+        res.json({ results });
+    } catch (error) {
+        console.error('Error in bulk credit:', error);
+        res.status(500).json({ error: error.message });
+    }
+});
+
 module.exports = router; 
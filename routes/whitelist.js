@@ -111,6 +111,53 @@ router.delete('/whitelist/:userId/:secret', checkWhitelistSecret, async (req, re
     }
 });
 
+const MAX_WHITELIST_BATCH = 1000;
+
+// Add or remove many users at once
+// Body: { action: 'add' | 'remove', userIds: [...], addedBy? }
+// Add answers { added, existing }, remove answers { removed, missing }, as lists of IDs
+router.post('/whitelist-batch/:secret', checkWhitelistSecret, async (req, res) => {
+    try {
+        const { action, addedBy } = req.body;
+        const userIds = [...new Set((req.body.userIds || []).map(String))];
+
+        if (!['add', 'remove'].includes(action)) {
+            return res.status(400).json({ error: 'Invalid action', validValues: ['add', 'remove'] });
+        }
+        if (userIds.length === 0 || userIds.length > MAX_WHITELIST_BATCH) {
+            return res.status(400).json({ error: `userIds must hold 1 to ${MAX_WHITELIST_BATCH} IDs` });
+        }
+
+        const existing = new Set((await Whitelist.findAll({
+            where: { userId: userIds },
+            attributes: ['userId']
+        })).map(entry => entry.userId));
+
+        if (action === 'add') {
+            const added = userIds.filter(userId => !existing.has(userId));
+            await Whitelist.bulkCreate(added.map(userId => ({
+                userId,
+                addedBy: addedBy || 'system',
+                username: null,
+                global_name: null,
+                avatar: null
+            })), { ignoreDuplicates: true });
+            console.log(`Whitelist batch: added ${added.length}, already present ${existing.size}`);
+            return res.json({ success: true, added, existing: [...existing] });
+        }
+
+        const removed = userIds.filter(userId => existing.has(userId));
+        if (removed.length > 0) {
+            await Whitelist.destroy({ where: { userId: removed } });
+        }
+        console.log(`Whitelist batch: removed ${removed.length}, not present ${userIds.length - removed.length}`);
+        res.json({ success: true, removed, missing: userIds.filter(userId => !existing.has(userId)) });
+    } catch (error) {
+        console.error('Error in whitelist batch:', error);
+        res.status(500).json({ error: error.message });
+    }
+});
+
 // Check if user is in whitelist
 router.get('/whitelist-check/:userId/:secret', checkWhitelistSecret, async (req, res) => {
     try {
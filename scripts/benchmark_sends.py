@@ -0,0 +1,213 @@
+"""Throughput benchmark for the OP send path against scripts/mock_upstream.py.
+
+Drives process_single_event (one event per size) and the /sendallop
+scheduler (several events at once) over synthetic events with stand-in
+Discord objects, then reports sends/sec, Engage request latency
+percentiles (per bulk request with --bulk-size) and peak RSS. Nothing
+leaves the machine.
+
+    python scripts/benchmark_sends.py --names 100,1000,10000 --events 10 --latency-ms 80 --rps 200
+"""
+import argparse
+import asyncio
+import os
+import resource
+import socket
+import statistics
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+import mock_upstream  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class FakeMember:
+    def __init__(self, member_id: int, name: str):
+        self.id = member_id
+        self.name = name
+        self.global_name = None
+        self.nick = None
+
+    @property
+    def display_name(self):
+        return self.nick or self.global_name or self.name
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int, member_count: int):
+        self.id = guild_id
+        self.members = [FakeMember(1000 + i, f"user{i}") for i in range(member_count)]
+        self._by_id = {member.id: member for member in self.members}
+
+    def get_member(self, member_id: int):
+        return self._by_id.get(member_id)
+
+
+class FakeMessage:
+    _next_id = 1
+
+    def __init__(self):
+        self.id = FakeMessage._next_id
+        FakeMessage._next_id += 1
+
+    async def edit(self, **kwargs):
+        return self
+
+    async def reply(self, *args, **kwargs):
+        return FakeMessage()
+
+
+class FakeChannel:
+    id = 1
+
+    async def send(self, *args, **kwargs):
+        return FakeMessage()
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def report(label: str, sends: int, seconds: float, latencies: list):
+    print(f"{label:<28} {sends:>8} {seconds:>9.2f} {sends / seconds if seconds else 0:>10.1f} "
+          f"{percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 99) * 1000:>8.1f} {peak_rss_mb():>9.1f}")
+
+
+async def run(args):
+    import pointssender as ps
+
+    # Engage latency is taken from the engage_request_seconds timer, which
+    # covers only the HTTP call, not rate limiter waits, backoff or retries
+    latencies = []
+    original_observe = ps.metrics.observe
+
+    def observe(name, seconds, **labels):
+        if name == 'engage_request_seconds':
+            latencies.append(seconds)
+        original_observe(name, seconds, **labels)
+
+    ps.metrics.observe = observe
+    ps.PROGRESS_UPDATE['interval'] = 0.5
+
+    sizes = [int(size) for size in args.names.split(',')]
+    config = mock_upstream.MockConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.engage_rps)
+    app = mock_upstream.create_app(config, [])
+    upstream = app['upstream']
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', args.port).start()
+
+    guild = FakeGuild(ps.SAHARA_GUILD_ID, max(sizes + [args.sendall_names]))
+    channel = FakeChannel()
+    ps.client.http_session = ps.create_http_session()
+    next_id = 1
+
+    print(f"{'scenario':<28} {'sends':>8} {'seconds':>9} {'sends/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'RSS MB':>9}")
+    try:
+        for size in sizes:
+            event = mock_upstream.make_events(1, size, args.distributions)[0]
+            event['id'] = next_id
+            next_id += 1
+            upstream.events = {event['id']: event}
+            credits_before = upstream.credits
+            latencies.clear()
+
+            started = time.perf_counter()
+            await ps.process_single_event(guild, channel, str(event['id']))
+            report(f"sendop {size} names", upstream.credits - credits_before, time.perf_counter() - started, latencies)
+
+        if args.events:
+            events = mock_upstream.make_events(args.events, args.sendall_names, args.distributions)
+            for event in events:
+                event['id'] = next_id
+                next_id += 1
+            upstream.events = {event['id']: event for event in events}
+            credits_before = upstream.credits
+            latencies.clear()
+
+            started = time.perf_counter()
+            results, error = await ps.process_events_concurrently(
+                guild,
+                ps.iter_bot_events(ps.client.http_session, status='Pending', page_size=500, summary=True),
+                channel
+            )
+            if error:
+                print(f"Listing events failed: {error}")
+            report(f"sendallop {args.events}x{args.sendall_names}", upstream.credits - credits_before,
+                   time.perf_counter() - started, latencies)
+            print(f"  per-event seconds: {statistics.mean(result['seconds'] for result in results):.2f} mean, "
+                  f"{max(result['seconds'] for result in results):.2f} max")
+    finally:
+        await ps.client.http_session.close()
+        await runner.cleanup()
+
+    print(f"Engage calls: {upstream.engage_calls}, rejected with 429: {upstream.rejected}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the OP send path against a local mock")
+    parser.add_argument('--names', default='100,1000,10000', help="Comma separated event sizes for /sendop")
+    parser.add_argument('--events', type=int, default=10, help="Events for the /sendallop run (0 skips it)")
+    parser.add_argument('--sendall-names', type=int, default=500, help="Recipients per /sendallop event")
+    parser.add_argument('--distributions', type=int, default=1)
+    parser.add_argument('--latency-ms', type=float, default=50)
+    parser.add_argument('--jitter-ms', type=float, default=20)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--engage-rps', type=float, default=0, help="Mock Engage quota (0 = unlimited)")
+    parser.add_argument('--rps', type=float, default=200, help="Bot-side ENGAGE_REQUESTS_PER_SECOND")
+    parser.add_argument('--concurrency', type=int, default=20, help="Bot-side ENGAGE_MAX_CONCURRENT_SENDS")
+    parser.add_argument('--bulk-size', type=int, default=0, help="Use bulk mode with this batch size")
+    parser.add_argument('--port', type=int, default=0)
+    args = parser.parse_args()
+    args.port = args.port or free_port()
+
+    # The bot reads its configuration at import time, so set it up first
+    base_url = f"http://127.0.0.1:{args.port}"
+    os.environ.update({
+        'DISCORD_TOKEN': 'benchmark',
+        'SAHARA_API_URL': base_url,
+        'ENGAGE_API_URL': f"{base_url}/api/addpoints",
+        'ENGAGE_API_TOKEN': 'benchmark',
+        'LOG_CHANNEL_ID': '1',
+        'SAHARA_GUILD_ID': '1',
+        'AUTHORIZED_USERS': '1',
+        'ENGAGE_REQUESTS_PER_SECOND': str(args.rps),
+        'ENGAGE_RATE_BURST': str(args.concurrency),
+        'ENGAGE_MAX_CONCURRENT_SENDS': str(args.concurrency),
+        'PROGRESS_UPDATE_EVERY': '1000000'
+    })
+    if args.bulk_size:
+        os.environ['ENGAGE_BULK_URL'] = f"{base_url}/api/bot/engage/bulk"
+        os.environ['ENGAGE_BULK_SIZE'] = str(args.bulk_size)
+
+    # Progress, pause state and the send ledger are kept in a scratch directory
+    workdir = tempfile.mkdtemp(prefix='op-benchmark-')
+    os.chdir(workdir)
+    os.environ['BOT_STATE_DB'] = os.path.join(workdir, 'bot_state.db')
+
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
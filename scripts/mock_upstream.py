@@ -0,0 +1,247 @@
+"""Local stand-in for the Engage credit API and the Sahara bot API.
+
+Serves synthetic events so distributions can be measured without touching
+production. Run directly, or use create_app() from the benchmark:
+
+    python scripts/mock_upstream.py --events 20 --names 1000 --latency-ms 80 --error-rate 0.01 --engage-rps 50
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from aiohttp import web
+
+
+class MockConfig:
+    def __init__(self, latency_ms: float = 50, jitter_ms: float = 20, error_rate: float = 0.0,
+                 engage_rps: float = 0, retry_after: float = 1.0):
+        self.latency_ms = latency_ms  # Mean Engage response time
+        self.jitter_ms = jitter_ms  # Uniform +/- jitter on the response time
+        self.error_rate = error_rate  # Share of Engage calls answered with a 500
+        self.engage_rps = engage_rps  # Engage quota; calls above it get 429 (0 disables)
+        self.retry_after = retry_after  # Retry-After seconds sent with a 429
+
+
+def make_events(count: int, names_per_event: int, distributions: int = 1, status: str = 'Pending') -> list:
+    """Builds synthetic events whose name lists use the names user0, user1, ..."""
+    events = []
+    start = datetime(2024, 1, 1)
+    for event_id in range(1, count + 1):
+        per_dist = max(1, names_per_event // distributions)
+        events.append({
+            'id': event_id,
+            'title': f"Benchmark event {event_id}",
+            'requestor': 'benchmark',
+            'eventDate': start.isoformat() + 'Z',
+            'status': status,
+            'updatedAt': (start + timedelta(seconds=event_id)).isoformat() + 'Z',
+            'distributions': [
+                {
+                    'id': event_id * 100 + dist_index,
+                    'xpAmount': 10 * (dist_index + 1),
+                    'nameList': "\n".join(f"user{i}" for i in range(dist_index * per_dist, (dist_index + 1) * per_dist))
+                }
+                for dist_index in range(distributions)
+            ]
+        })
+    return events
+
+
+class MockUpstream:
+    """Holds the mock state and the request handlers"""
+    BULK_CREDIT_CONCURRENCY = 10  # As in routes/api.js
+
+    def __init__(self, config: MockConfig, events: list):
+        self.config = config
+        self.events = {event['id']: event for event in events}
+        self.credits = 0
+        self.engage_calls = 0
+        self.rejected = 0
+        self.not_modified = 0
+        self._window_start = time.monotonic()
+        self._window_calls = 0
+
+    async def _engage_delay(self):
+        delay = self.config.latency_ms + random.uniform(-self.config.jitter_ms, self.config.jitter_ms)
+        await asyncio.sleep(max(0, delay) / 1000)
+
+    def _over_quota(self) -> bool:
+        if not self.config.engage_rps:
+            return False
+        now = time.monotonic()
+        if now - self._window_start >= 1:
+            self._window_start = now
+            self._window_calls = 0
+        self._window_calls += 1
+        return self._window_calls > self.config.engage_rps
+
+    def _credit_status(self) -> int:
+        self.engage_calls += 1
+        if self._over_quota():
+            self.rejected += 1
+            return 429
+        if random.random() < self.config.error_rate:
+            return 500
+        self.credits += 1
+        return 200
+
+    async def add_points(self, request: web.Request) -> web.Response:
+        if 'userId' not in request.query or 'points' not in request.query:
+            return web.json_response({'error': 'userId and points are required'}, status=400)
+        await self._engage_delay()
+        status = self._credit_status()
+        if status == 429:
+            return web.json_response({'error': 'Too many requests'}, status=429,
+                                     headers={'Retry-After': str(self.config.retry_after)})
+        if status != 200:
+            return web.json_response({'error': 'Internal error'}, status=status)
+        return web.json_response({'success': True})
+
+    async def bulk_credit(self, request: web.Request) -> web.Response:
+        """Mirrors POST /api/bot/engage/bulk in routes/api.js: one Engage call per
+        user, BULK_CREDIT_CONCURRENCY at a time and no faster than the
+        requestsPerSecond the bot sends; after a 429 the rest are skipped"""
+        body = await request.json()
+        user_ids = [str(user_id) for user_id in body.get('userIds', [])]
+        interval = 1 / body['requestsPerSecond'] if body.get('requestsPerSecond') else 0
+        results = [None] * len(user_ids)
+        pending = iter(range(len(user_ids)))
+        next_start = time.monotonic()
+        rate_limited = False
+
+        async def pace():
+            nonlocal next_start
+            if not interval:
+                return
+            now = time.monotonic()
+            start_at = max(now, next_start)
+            next_start = start_at + interval
+            if start_at > now:
+                await asyncio.sleep(start_at - now)
+
+        async def worker():
+            nonlocal rate_limited
+            for index in pending:
+                if not rate_limited:
+                    await pace()
+                if rate_limited:
+                    results[index] = {'userId': user_ids[index], 'success': False, 'status': 429, 'skipped': True}
+                    continue
+                await self._engage_delay()
+                status = self._credit_status()
+                results[index] = {'userId': user_ids[index], 'success': status == 200, 'status': status}
+                if status == 429:
+                    rate_limited = True
+                    results[index]['retryAfter'] = str(self.config.retry_after)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.BULK_CREDIT_CONCURRENCY, len(user_ids)))))
+        return web.json_response({'results': results})
+
+    def _summary(self, event: dict) -> dict:
+        counts = [len([name for name in dist['nameList'].split('\n') if name.strip()]) for dist in event['distributions']]
+        return {
+            'id': event['id'],
+            'title': event['title'],
+            'status': event['status'],
+            'eventDate': event['eventDate'],
+            'updatedAt': event['updatedAt'],
+            'changedAt': self._changed_at(event),
+            'distributionCount': len(counts),
+            'recipientCount': sum(counts)
+        }
+
+    @staticmethod
+    def _changed_at(event: dict) -> str:
+        """The later of the event's and its distributions' updatedAt, like EVENT_CHANGED_AT"""
+        return max([event['updatedAt']] + [dist['updatedAt'] for dist in event['distributions'] if 'updatedAt' in dist])
+
+    async def list_events(self, request: web.Request) -> web.Response:
+        query = request.query
+        server_time = datetime.utcnow().isoformat() + 'Z'
+        events = sorted(self.events.values(), key=lambda event: (self._changed_at(event), event['id']))
+        if 'status' in query:
+            events = [event for event in events if event['status'] == query['status']]
+        if 'updatedAfter' in query:
+            events = [event for event in events if self._changed_at(event) >= query['updatedAfter']]
+        if 'cursor' in query:
+            cursor = json.loads(base64.urlsafe_b64decode(query['cursor'] + '==='))
+            events = [event for event in events if (self._changed_at(event), event['id']) > (cursor['changedAt'], cursor['id'])]
+
+        format_event = self._summary if query.get('view') == 'summary' else (lambda event: event)
+        if 'limit' not in query:
+            return web.json_response({'data': [format_event(event) for event in events], 'serverTime': server_time})
+
+        limit = min(int(query['limit']), 500)
+        page = events[:limit]
+        next_cursor = None
+        if len(events) > limit:
+            last = page[-1]
+            next_cursor = base64.urlsafe_b64encode(
+                json.dumps({'changedAt': self._changed_at(last), 'id': last['id']}).encode()
+            ).decode().rstrip('=')
+        return web.json_response({
+            'data': [format_event(event) for event in page],
+            'nextCursor': next_cursor,
+            'serverTime': server_time
+        })
+
+    async def get_event(self, request: web.Request) -> web.Response:
+        event = self.events.get(int(request.match_info['event_id']))
+        if not event:
+            return web.json_response({'error': 'Event not found'}, status=404)
+        etag = '"' + hashlib.sha1(json.dumps(event, sort_keys=True).encode()).hexdigest() + '"'
+        if request.headers.get('If-None-Match') == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.json_response(event, headers={'ETag': etag})
+
+    async def update_event(self, request: web.Request) -> web.Response:
+        event = self.events.get(int(request.match_info['event_id']))
+        if not event:
+            return web.json_response({'error': 'Event not found'}, status=404)
+        body = await request.json()
+        event['status'] = body.get('status', event['status'])
+        event['updatedAt'] = datetime.utcnow().isoformat() + 'Z'
+        return web.json_response({'success': True, 'event': {'id': event['id'], 'status': event['status']}})
+
+
+def create_app(config: MockConfig, events: list) -> web.Application:
+    """Builds the mock application; the MockUpstream is available as app['upstream']"""
+    upstream = MockUpstream(config, events)
+    app = web.Application()
+    app['upstream'] = upstream
+    app.router.add_get('/api/addpoints', upstream.add_points)
+    app.router.add_post('/api/bot/engage/bulk', upstream.bulk_credit)
+    app.router.add_get('/api/bot/events', upstream.list_events)
+    app.router.add_get('/api/bot/events/{event_id}', upstream.get_event)
+    app.router.add_put('/api/bot/events/{event_id}', upstream.update_event)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local Engage/Sahara stand-in")
+    parser.add_argument('--port', type=int, default=3100)
+    parser.add_argument('--events', type=int, default=10, help="Number of pending events to serve")
+    parser.add_argument('--names', type=int, default=1000, help="Recipients per event")
+    parser.add_argument('--distributions', type=int, default=1, help="Distributions per event")
+    parser.add_argument('--latency-ms', type=float, default=50)
+    parser.add_argument('--jitter-ms', type=float, default=20)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--engage-rps', type=float, default=0, help="Engage quota before 429s (0 = unlimited)")
+    parser.add_argument('--retry-after', type=float, default=1.0)
+    args = parser.parse_args()
+
+    config = MockConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.engage_rps, args.retry_after)
+    events = make_events(args.events, args.names, args.distributions)
+    print(f"Engage: http://localhost:{args.port}/api/addpoints")
+    print(f"Sahara: http://localhost:{args.port}")
+    web.run_app(create_app(config, events), port=args.port)
+
+
+if __name__ == '__main__':
+    main()
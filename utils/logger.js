@@ -1,4 +1,5 @@
 const { Client, GatewayIntentBits } = require('discord.js');
+const crypto = require('crypto');
 
 // Initialize Discord client with extended intents
 const client = new Client({ 
@@ -23,6 +24,15 @@ let initializationPromise = null;
 let initializationAttempts = 0;
 const MAX_RETRY_ATTEMPTS = 3;
 
+// Recent entries kept in memory for the bot's log relay (GET /api/bot/logs).
+// Entry seq numbers start at 1 and restart with the process; bootId tells
+// the relay that an old cursor no longer applies.
+const LOG_BUFFER_SIZE = parseInt(process.env.LOG_BUFFER_SIZE, 10) || 1000;
+const bootId = crypto.randomUUID();
+const logBuffer = new Array(LOG_BUFFER_SIZE);
+let nextSeq = 1;
+let logWaiters = [];
+
 // Handle client errors
 client.on('error', error => {
     console.error('Discord client error:', error);
@@ -185,7 +195,35 @@ async function sendLogToDiscord(data) {
     }
 }
 
+// Log type used by the bot to pick an emoji for an entry
+function getLogType(action = '') {
+    if (action === 'LOGIN' || action === 'LOGOUT') return 'login';
+    if (action.startsWith('WHITELIST')) return 'whitelist';
+    if (action.endsWith('EVENT') || action.endsWith('DISTRIBUTION') || action === 'STATUS_CHANGE') return 'event';
+    return 'other';
+}
+
+function recordLog({ action, userId, username, details }) {
+    const seq = nextSeq++;
+    logBuffer[seq % LOG_BUFFER_SIZE] = {
+        seq,
+        timestamp: new Date().toISOString(),
+        type: getLogType(action),
+        action,
+        userId,
+        user: username || userId,
+        details: formatDetails(details)
+    };
+
+    // Wake long-polling relays
+    const waiters = logWaiters;
+    logWaiters = [];
+    waiters.forEach(wake => wake());
+}
+
 const Logger = {
+    bootId,
+
     // Send log to Discord
     log: async (data) => {
         const { action, userId, username, details } = data;
@@ -194,6 +232,8 @@ const Logger = {
             throw new Error('UserId is required');
         }
 
+        recordLog(data);
+
         // Always log to console
         console.log('Log entry:', { action, userId, username, details });
         
@@ -219,6 +259,41 @@ const Logger = {
         }
     },
 
+    // Buffered entries with seq > after, oldest first. missed counts entries
+    // that were overwritten before they could be read.
+    getLogs: (after, limit) => {
+        const oldest = Math.max(1, nextSeq - LOG_BUFFER_SIZE);
+        const from = Math.max(after + 1, oldest);
+        const to = Math.min(nextSeq, from + limit);
+        const logs = [];
+        for (let seq = from; seq < to; seq++) {
+            logs.push(logBuffer[seq % LOG_BUFFER_SIZE]);
+        }
+        return {
+            logs,
+            lastSeq: nextSeq - 1,
+            hasMore: to < nextSeq,
+            missed: Math.max(0, from - (after + 1))
+        };
+    },
+
+    // Resolves once an entry with seq > after exists, or after timeoutMs
+    waitForLogs: (after, timeoutMs) => new Promise(resolve => {
+        if (nextSeq - 1 > after) {
+            resolve();
+            return;
+        }
+        const timer = setTimeout(() => {
+            logWaiters = logWaiters.filter(wake => wake !== onLog);
+            resolve();
+        }, timeoutMs);
+        const onLog = () => {
+            clearTimeout(timer);
+            resolve();
+        };
+        logWaiters.push(onLog);
+    }),
+
     // Helper functions
     getColorForAction: (action) => {
         const colors = {